@@ -560,9 +560,15 @@ def recalculate_image() -> None:
     shape = (get_current_height(), get_current_width())
     bounds = (current_x_min, current_x_max, current_y_min, current_y_max)
     maxiter = get_current_iterations()
-    current_fractal = active_renderer.compute(shape, bounds, maxiter)
-    current_Z = current_fractal.astype(np.float64)
-    current_Z[current_Z == 0] = 1e-10  # prevent log(0)
+    # only the log coloring reads Z, the kernel channel runs the compact engine
+    log_coloring = get_current_coloring_mode() == "Log Coloring"
+    active_renderer.channels = ("z",) if log_coloring else ()
+    result = active_renderer.compute(shape, bounds, maxiter)
+    current_fractal, outputs = result if log_coloring else (result, {})
+    current_Z = outputs.get("z")  # deep zooms have no channels
+    if current_Z is None:
+        current_Z = current_fractal.astype(np.float32)
+        current_Z[current_Z == 0] = 1e-10  # prevent log(0)
     current_mask = current_fractal < maxiter
 
     modify_fractal()
@@ -0,0 +1,63 @@
+"""Times the numpy engines for multibrot degrees 2..16 (plus real exponents).
+
+Run: python benchmark_multibrot.py [--resolution 400] [--iterations 100]
+The "z**d" column is plain numpy complex power for comparison.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from mandel_all import MandelbrotCalculator, grid_axes
+
+ENGINES = {
+    "complex": {"use_complex": True},
+    "split": {"use_complex": False},
+    "split-mask": {"use_complex": False, "in_place": True, "use_mask": True},
+    "blocked": {"use_complex": False, "block_size": "auto"},
+}
+
+
+def naive_power(shape, bounds, maxiter, degree):
+    x, y = grid_axes(shape, bounds)
+    c = x[np.newaxis, :] + 1j * y[:, np.newaxis]
+    z = np.zeros_like(c)
+    div_time = np.full(shape, maxiter)
+    for i in range(maxiter):
+        z = z**degree + c
+        escaped = np.abs(z) > 2
+        div_time[escaped & (div_time == maxiter)] = i
+        z[escaped] = 2
+    return div_time
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resolution", type=int, default=400)
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    shape = (args.resolution, args.resolution)
+    bounds = (-1.6, 1.6, -1.6, 1.6)
+    degrees = list(range(2, 17)) + [2.5, 3.7]
+
+    print("degree " + "".join(f"{name:>12}" for name in [*ENGINES, "z**d"]))
+    for degree in degrees:
+        row = [
+            timed(
+                MandelbrotCalculator(**config).compute,
+                shape,
+                bounds,
+                args.iterations,
+                degree,
+            )
+            for config in ENGINES.values()
+        ]
+        row.append(timed(naive_power, shape, bounds, args.iterations, degree))
+        print(f"{degree:>6} " + "".join(f"{t:>11.3f}s" for t in row))
@@ -0,0 +1,47 @@
+"""Times the TF engines: one step call per iteration, the compacted masking
+engine and the fused XLA loop.
+
+Run: python benchmark_tf_loop.py [--iterations 200] [--resolutions 100 400 800]
+The first call of every configuration compiles and is not timed.
+"""
+import argparse
+import time
+
+from mandelcomplex import MandelComplex
+from mandelnocomplex import MandelNoComplex
+
+MODES = {
+    "step": {"functionality": (False, False), "fused_loop": False},
+    "masking": {"functionality": (False, True), "fused_loop": False},
+    "fused": {"functionality": (False, False), "fused_loop": True},
+}
+
+
+def timed(mandel, mode):
+    mandel.set_functionality(*MODES[mode]["functionality"])
+    mandel.set_fused_loop(MODES[mode]["fused_loop"])
+    mandel.calculate_mandelbrot()  # trace/compile
+    start = time.perf_counter()
+    mandel.calculate_mandelbrot()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--resolutions", type=int, nargs="+", default=[100, 400, 800])
+    args = parser.parse_args()
+
+    rows = []
+    for engine in (MandelComplex, MandelNoComplex):
+        for resolution in args.resolutions:
+            mandel = engine()
+            mandel.set_resolution(resolution, resolution)
+            mandel.set_iterations(args.iterations)
+            rows.append(
+                (engine.__name__, resolution, [timed(mandel, mode) for mode in MODES])
+            )
+
+    print(f"{'engine':<16}{'resolution':>11}" + "".join(f"{m:>10}" for m in MODES))
+    for name, resolution, times in rows:
+        print(f"{name:<16}{resolution:>11}" + "".join(f"{t:>9.3f}s" for t in times))
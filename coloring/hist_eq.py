@@ -5,9 +5,10 @@ from coloring.base import ColoringInterface
 class HistogramEquilization(ColoringInterface):
 
     def apply(self, data, Z, mask, iterations, cycles):
-        hist = np.bincount(data.flatten().astype("int32"), minlength=iterations)
-        hist = hist / hist.sum()
-        chist = np.cumsum(hist)
-        res = chist[data.ravel().astype("int32")].reshape(data.shape) * iterations
+        # unsigned counts index directly, smooth (float) counts are truncated
+        bins = data if np.issubdtype(data.dtype, np.unsignedinteger) else data.astype(np.uint32)
+        hist = np.bincount(bins.ravel(), minlength=iterations)
+        chist = np.cumsum(hist / hist.sum()).astype(np.float32)
+        res = chist[bins] * iterations
 
         return res % (iterations / cycles)
@@ -4,12 +4,18 @@ from coloring.base import ColoringInterface
 
 class LogColoring(ColoringInterface):
     def apply(self, data, Z, mask, iterations, cycles):
+        if Z is None:
+            # data already holds continuous iteration counts
+            return data % (iterations / cycles)
         t = np.abs(Z)
-        arg = mask * t + (1 - mask) * 2
+        arg = np.where(mask, t, 2)  # keeps the float32 of compact data
 
         arg = np.clip(arg, 1e-10, None)
         log_arg = np.log(arg)
         log_arg = np.clip(log_arg, 1e-10, None)
 
-        tmp = data + 1 + 1.0 / np.log(2.0) * np.log(np.log(2.0) / log_arg)
+        # log(2) in the precision of Z, a float64 scalar would upcast float32
+        ln2 = np.log(2.0, dtype=log_arg.dtype)
+        # float32 before adding, unsigned counts would wrap around at their max
+        tmp = data.astype(np.float32) + 1 + np.log2(ln2 / log_arg)
         return tmp % (iterations / cycles)
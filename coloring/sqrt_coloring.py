@@ -4,7 +4,8 @@ import numpy as np
 
 class SqrtColoring(ColoringInterface):
     def apply(self, data, Z, mask, iterations, cycles):
-        transformed = np.sqrt(iterations + 2 - data)
+        # float32 before subtracting, unsigned counts would wrap around
+        transformed = np.sqrt(np.float32(iterations + 2) - data)
         l, h = transformed.min(), transformed.max()
         normalized = (transformed - l) / (h - l)
         return (normalized * iterations) % (iterations / cycles)
@@ -237,14 +237,14 @@ class ColorizeApp():
         self._current_cycles = self._default_cycles
 
     #colorize fractal -----------------------------
-    def modify_fractal(self, fractal: np.ndarray, iterations: int) -> np.ndarray:
-        #modify image
-        fractal_modified = self._modify_data(fractal, iterations)
+    def modify_fractal(self, fractal: np.ndarray, iterations: int, channels: dict = None) -> np.ndarray:
+        #modify image, channels are the kernel outputs of ComputeApp.get_last_channels()
+        fractal_modified = self._modify_data(fractal, iterations, channels)
         print("Variance:", np.var(fractal_modified / np.max(fractal_modified)))
         #return result
         return fractal_modified
 
-    def _modify_data(self, data: np.ndarray, iterations: int) -> np.ndarray:
+    def _modify_data(self, data: np.ndarray, iterations: int, channels: dict = None) -> np.ndarray:
         current_color_plugin = self._col[self._current_col_pos]
 
         print(f"used color plugin: {current_color_plugin}")
@@ -252,8 +252,13 @@ class ColorizeApp():
         if current_color_plugin == "none":
             return data
 
-        current_Z = data.astype(np.float64)
-        current_Z[current_Z == 0] = 1e-10 #prevent log(0)
+        if channels and "z" in channels:
+            current_Z = channels["z"] #real final z from the kernel
+        elif np.issubdtype(data.dtype, np.floating):
+            current_Z = None #continuous counts from the kernel (smooth mode), nothing to fake
+        else:
+            current_Z = data.astype(np.float32) #single precision like the counts
+            current_Z[current_Z == 0] = 1e-10 #prevent log(0)
         current_mask = data < iterations
 
         try:
@@ -323,7 +328,7 @@ if __name__ == "__main__":
     input_name = remove_file_endings(input_name)
     fractal = np.load(f"{input_name}.npy")
     #get iterations from data if not specified
-    maxiter = cmd_params.get('iterations', np.max(fractal))
+    maxiter = cmd_params.get('iterations', np.max(fractal).item()) #python number, compact dtypes would wrap around
     #modify input
     fractal = node_colorize.modify_fractal(fractal, maxiter)
     #save image
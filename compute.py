@@ -1,7 +1,15 @@
 import numpy as np
 import argparse
+import os
+from collections import deque
+from decimal import Decimal
 
-from mandel_all import MandelbrotCalculator
+from mandel_all import OUTPUT_CHANNELS, MandelbrotCalculator, grid_axes
+from mandel_cache import DEFAULT_MEMORY_BYTES, TileCache, grid_shift
+from mandel_job import RenderJob
+from mandel_perturbation import needs_deep_zoom, to_decimal
+from mandel_progress import null_progress
+from mandel_resume import IterationState
 
 
 class ComputeApp:
@@ -22,6 +30,28 @@ class ComputeApp:
         self._default_use_complex = True
         self._default_in_place = False
         self._default_use_mask = False
+        self._default_use_numba = False
+        self._default_skip_interior = False
+        self._default_periodicity = False
+        self._default_subdivide = False
+        self._default_min_rect_size = 8
+        self._default_progressive = False
+        self._default_deep_zoom = False
+        self._default_resumable = False
+        self._default_tile_cache = False
+        self._default_reuse_views = True
+        self._default_symmetry = False
+        self._default_compact = False
+        self._default_block_size = None
+        self._default_smooth = False
+        self._default_channels = ()
+        self._default_max_memory = None
+        self._default_cache_dir = None
+        self._default_cache_mb = DEFAULT_MEMORY_BYTES // 2**20
+        self._default_progress_callback = null_progress
+
+        self._default_workers = 1
+        self._default_tile_size = None
 
         params = initial_params if initial_params else {}
 
@@ -30,32 +60,95 @@ class ComputeApp:
         self._current_width = params.get("resolution", self._default_resolution)
         self._current_height = params.get("resolution", self._default_resolution)
         self._current_threshold = params.get("threshold", self._default_threshold)
-        self._current_x_min = params.get("xmin", self._default_x_min)
-        self._current_x_max = params.get("xmax", self._default_x_max)
-        self._current_y_min = params.get("ymin", self._default_y_min)
-        self._current_y_max = params.get("ymax", self._default_y_max)
+        self.set_boundaries(
+            [
+                params.get("xmin", self._default_x_min),
+                params.get("xmax", self._default_x_max),
+                params.get("ymin", self._default_y_min),
+                params.get("ymax", self._default_y_max),
+            ]
+        )
 
         self._current_use_complex = params.get("use_complex", self._default_use_complex)
         self._current_in_place = params.get("in_place", self._default_in_place)
         self._current_use_mask = params.get("use_mask", self._default_use_mask)
+        self._current_use_numba = params.get("use_numba", self._default_use_numba)
+        self._current_skip_interior = params.get(
+            "skip_interior", self._default_skip_interior
+        )
+        self._current_periodicity = params.get("periodicity", self._default_periodicity)
+        self._current_subdivide = params.get("subdivide", self._default_subdivide)
+        self._current_min_rect_size = params.get(
+            "min_rect_size", self._default_min_rect_size
+        )
+        self._current_progressive = params.get("progressive", self._default_progressive)
+        self._current_deep_zoom = params.get("deep_zoom", self._default_deep_zoom)
+        self._current_resumable = params.get("resumable", self._default_resumable)
+        self._current_reuse_views = params.get("reuse_views", self._default_reuse_views)
+        self._current_symmetry = params.get("symmetry", self._default_symmetry)
+        self._current_compact = params.get("compact", self._default_compact)
+        self._current_block_size = params.get("block_size", self._default_block_size)
+        self._current_smooth = params.get("smooth", self._default_smooth)
+        self._current_channels = tuple(params.get("channels", self._default_channels))
+        self._current_max_memory = params.get("max_memory", self._default_max_memory)
+        self._current_tile_cache = None  # TileCache instance while enabled
+        self.set_tile_cache(
+            params.get("tile_cache", self._default_tile_cache),
+            params.get("cache_dir", self._default_cache_dir),
+            params.get("cache_mb", self._default_cache_mb),
+        )
+
+        self._current_workers = params.get("workers", self._default_workers)
+        self._current_tile_size = params.get("tile_size", self._default_tile_size)
+        # not a parameter: set by the front end, e.g. the GUI progress bar
+        self._current_progress_callback = self._default_progress_callback
+
+        # recently rendered views, pans/Back only compute newly exposed pixels
+        self._view_history = deque(maxlen=4)
+        self._last_reused_pixels = 0
+        self._last_channels = {}
+        self._last_job_stats = {}
 
         self._active_renderer = MandelbrotCalculator(
             use_complex=self._current_use_complex,
             in_place=self._current_in_place,
             use_mask=self._current_use_mask,
+            use_numba=self._current_use_numba,
+            skip_interior=self._current_skip_interior,
+            periodicity=self._current_periodicity,
+            subdivide=self._current_subdivide,
+            min_rect_size=self._current_min_rect_size,
+            workers=self._current_workers,
+            tile_size=self._current_tile_size,
+            deep_zoom=self._current_deep_zoom,
+            resumable=self._current_resumable,
+            tile_cache=self._current_tile_cache,
+            symmetry=self._current_symmetry,
+            compact=self._current_compact,
+            block_size=self._current_block_size,
+            threshold=self._current_threshold,
+            smooth=self._current_smooth,
+            channels=self._current_channels,
+            max_memory=self._current_max_memory,
+            progress_callback=self._current_progress_callback,
         )
 
     # getters/setters -----------------------------
 
-    def get_computation_methods(self) -> (bool, bool, bool):
+    def get_computation_methods(self) -> (bool, bool, bool, bool):
         return (
             self._current_use_complex,
             self._current_in_place,
             self._current_use_mask,
+            self._current_use_numba,
         )
 
     def set_computation_methods(
-        self, use_complex: bool = None, in_place: bool = None, use_mask: bool = None
+        self,
+        use_complex: bool = None,
+        in_place: bool = None,
+        use_mask: bool = None,
+        use_numba: bool = None,
     ) -> None:
         if use_complex is not None:
             self._current_use_complex = use_complex
@@ -63,6 +156,150 @@ class ComputeApp:
             self._current_in_place = in_place
         if use_mask is not None:
             self._current_use_mask = use_mask
+        if use_numba is not None:
+            self._current_use_numba = use_numba
+
+    def get_skip_interior(self) -> bool:
+        return self._current_skip_interior
+
+    def set_skip_interior(self, skip_interior: bool) -> None:
+        self._current_skip_interior = skip_interior
+
+    def get_periodicity(self) -> bool:
+        return self._current_periodicity
+
+    def set_periodicity(self, periodicity: bool) -> None:
+        self._current_periodicity = periodicity
+
+    def get_subdivision(self) -> (bool, int):
+        return (self._current_subdivide, self._current_min_rect_size)
+
+    def set_subdivision(self, subdivide: bool = None, min_rect_size: int = None) -> None:
+        if subdivide is not None:
+            self._current_subdivide = subdivide
+        if min_rect_size is not None:
+            self._current_min_rect_size = max(2, min_rect_size)
+
+    def get_progressive(self) -> bool:
+        return self._current_progressive
+
+    def set_progressive(self, progressive: bool) -> None:
+        self._current_progressive = progressive
+
+    def get_progress_callback(self):
+        return self._current_progress_callback
+
+    def set_progress_callback(self, callback) -> None:
+        # callback(iteration, total, live, elapsed), see mandel_progress
+        self._current_progress_callback = callback
+
+    def get_deep_zoom(self) -> bool:
+        return self._current_deep_zoom
+
+    def set_deep_zoom(self, deep_zoom: bool) -> None:
+        self._current_deep_zoom = deep_zoom
+
+    def get_resumable(self) -> bool:
+        return self._current_resumable
+
+    def set_resumable(self, resumable: bool) -> None:
+        self._current_resumable = resumable
+
+    def save_iteration_state(self, path: str) -> None:
+        # orbits of the last resumable render, so a later run can continue it
+        if self._active_renderer.iteration_state is not None:
+            self._active_renderer.iteration_state.save(path)
+
+    def load_iteration_state(self, path: str) -> None:
+        self._active_renderer.iteration_state = IterationState.load(path)
+
+    def get_symmetry(self) -> bool:
+        return self._current_symmetry
+
+    def set_symmetry(self, symmetry: bool) -> None:
+        self._current_symmetry = symmetry
+
+    def get_compact(self) -> bool:
+        return self._current_compact
+
+    def set_compact(self, compact: bool) -> None:
+        self._current_compact = compact
+
+    def get_block_size(self):
+        return self._current_block_size
+
+    def set_block_size(self, block_size) -> None:
+        # iterations between escape checks, "auto" adapts it, None/0 disables
+        self._current_block_size = block_size if block_size else None
+
+    def get_smooth(self) -> bool:
+        return self._current_smooth
+
+    def set_smooth(self, smooth: bool) -> None:
+        # continuous (float) iteration counts instead of integers
+        self._current_smooth = smooth
+
+    def get_channels(self) -> tuple:
+        return self._current_channels
+
+    def set_channels(self, channels) -> None:
+        # per-pixel kernel outputs next to the escape times, see OUTPUT_CHANNELS
+        self._current_channels = tuple(channels) if channels else ()
+
+    def get_last_channels(self) -> dict:
+        return self._last_channels
+
+    def get_job_stats(self) -> dict:
+        return self._last_job_stats
+
+    def get_max_memory(self) -> int:
+        return self._current_max_memory
+
+    def set_max_memory(self, max_memory: int) -> None:
+        # byte budget of the work buffers, views are computed in row bands
+        self._current_max_memory = max_memory if max_memory else None
+
+    def get_reuse_views(self) -> bool:
+        return self._current_reuse_views
+
+    def set_reuse_views(self, reuse_views: bool) -> None:
+        self._current_reuse_views = reuse_views
+        if not reuse_views:
+            self._view_history.clear()
+
+    def get_reused_pixels(self) -> int:
+        return self._last_reused_pixels
+
+    def get_tile_cache(self) -> bool:
+        return self._current_tile_cache is not None
+
+    def set_tile_cache(
+        self, enabled: bool, directory: str = None, max_megabytes: int = None
+    ) -> None:
+        if not enabled:
+            self._current_tile_cache = None
+        elif self._current_tile_cache is None or directory is not None:
+            megabytes = max_megabytes or self._default_cache_mb
+            self._current_tile_cache = TileCache(megabytes * 2**20, directory)
+        elif max_megabytes is not None:
+            self._current_tile_cache.max_bytes = max_megabytes * 2**20
+
+    def get_cache_stats(self) -> dict:
+        if self._current_tile_cache is None:
+            return {}
+        return dict(self._current_tile_cache.stats)
+
+    def get_last_stats(self) -> dict:
+        return self._active_renderer.last_stats
+
+    def get_parallelism(self) -> (int, int):
+        return (self._current_workers, self._current_tile_size)
+
+    def set_parallelism(self, workers: int = None, tile_size: int = None) -> None:
+        if workers is not None:
+            self._current_workers = max(1, workers)  # min: 1 process
+        if tile_size is not None:
+            self._current_tile_size = tile_size if tile_size > 0 else None
 
     def get_iterations(self) -> int:
         return self._current_iterations
@@ -94,14 +331,19 @@ class ComputeApp:
         self._current_threshold = threshold
 
     def get_boundaries(self) -> [float, float, float, float]:
+        return [float(b) for b in self.get_exact_boundaries()]
+
+    def get_exact_boundaries(self) -> [Decimal, Decimal, Decimal, Decimal]:
         return [
-            self._current_x_min,
-            self._current_x_max,
-            self._current_y_min,
-            self._current_y_max,
+            to_decimal(self._current_x_min),
+            to_decimal(self._current_x_max),
+            to_decimal(self._current_y_min),
+            to_decimal(self._current_y_max),
         ]
 
     def set_boundaries(self, bounds: [float, float, float, float]) -> None:
+        # strings are kept as Decimal, deep zooms need more digits than float64
+        bounds = [to_decimal(b) if isinstance(b, str) else b for b in bounds]
         self._current_x_min = bounds[0]
         self._current_x_max = bounds[1]
         self._current_y_min = bounds[2]
@@ -121,24 +363,205 @@ class ComputeApp:
         self._current_use_complex = self._default_use_complex
         self._current_in_place = self._current_in_place
         self._current_use_mask = self._default_use_mask
+        self._current_use_numba = self._default_use_numba
+        self._current_skip_interior = self._default_skip_interior
+        self._current_periodicity = self._default_periodicity
+        self._current_subdivide = self._default_subdivide
+        self._current_min_rect_size = self._default_min_rect_size
+        self._current_progressive = self._default_progressive
+        self._current_deep_zoom = self._default_deep_zoom
+        self._current_resumable = self._default_resumable
+        self.set_tile_cache(self._default_tile_cache)
+        self.set_reuse_views(self._default_reuse_views)
+        self._current_symmetry = self._default_symmetry
+        self._current_compact = self._default_compact
+        self._current_block_size = self._default_block_size
+        self._current_smooth = self._default_smooth
+        self._current_channels = self._default_channels
+        self._current_max_memory = self._default_max_memory
 
     # compute fractal -----------------------------
-    def recompute(self, degree) -> np.ndarray:
-        # pass values to active renderer (no setters though)
-        self._active_renderer.use_complex = self._current_use_complex
-        self._active_renderer.in_place = self._current_in_place
-        self._active_renderer.use_mask = self._current_use_mask
+    def recompute(self, degree=2) -> np.ndarray:
+        self._last_channels = {}
+        if self._current_channels:
+            # channels come from a single kernel run, no reuse or refinement
+            self._update_renderer()
+            self._last_reused_pixels = 0
+            current_fractal, self._last_channels = self._active_renderer.compute(
+                self._get_shape(),
+                tuple(self.get_exact_boundaries()),
+                self.get_iterations(),
+                degree,
+            )
+            return current_fractal
+
+        if self._current_progressive:
+            for _, current_fractal in self.recompute_progressive(degree):
+                pass
+            return current_fractal
+
+        self._update_renderer()
+
+        shape = self._get_shape()
+        bounds = tuple(self.get_exact_boundaries())
+        self._last_reused_pixels = 0
+        # the strips are iterated point by point: no symmetry nudge, no
+        # subdivision and no perturbation, views using them are not reused
+        if (
+            not self._current_reuse_views
+            or self._current_symmetry
+            or self._current_subdivide
+            or self._current_deep_zoom
+            or needs_deep_zoom(shape, bounds)
+        ):
+            return self._active_renderer.compute(
+                shape, bounds, self.get_iterations(), degree
+            )
+
+        settings = (self.get_iterations(), degree, self._get_engine_settings())
+        current_fractal = self._reuse_previous_views(shape, bounds, degree, settings)
+        if current_fractal is None:
+            current_fractal = self._active_renderer.compute(
+                shape, bounds, self.get_iterations(), degree
+            )
+        # own copy, callers may modify the returned array
+        self._view_history.append((settings, shape, bounds, current_fractal.copy()))
 
-        # self._active_renderer.set_threshold(self._current_threshold)    #TODO task 3 - how does mandel_all handle threshold value? There is no support for it any more
+        return current_fractal
 
-        current_fractal = self._active_renderer.compute(
-            tuple(self.get_resolution()),
-            tuple(self.get_boundaries()),
+    def recompute_to_file(self, path: str, degree=2) -> np.ndarray:
+        """Streams the view into a .npy file band by band, returns it as memmap"""
+        if self._current_progressive:
+            raise ValueError("Streaming to a file can't be combined with progressive")
+        self._update_renderer()
+        self._last_reused_pixels = 0
+        self._last_channels = {}
+        return self._active_renderer.compute_to_file(
+            path,
+            self._get_shape(),
+            tuple(self.get_exact_boundaries()),
             self.get_iterations(),
             degree,
         )
 
-        return current_fractal
+    def recompute_job(self, path: str, degree=2) -> np.ndarray:
+        """Renders the view as restartable tiled job into path, see RenderJob"""
+        self._update_renderer()
+        self._last_reused_pixels = 0
+        self._last_channels = {}
+        job = RenderJob(
+            path,
+            self._get_shape(),
+            tuple(self.get_exact_boundaries()),
+            self.get_iterations(),
+            degree,
+            self._current_tile_size,
+        )
+        result = job.run(self._active_renderer)
+        self._last_job_stats = job.stats
+        return result
+
+    def recompute_progressive(self, degree=2):
+        """Yields (step, fractal) for every successive refinement level"""
+        self._update_renderer()
+        self._last_channels = {}  # refinement levels carry no channels
+
+        return self._active_renderer.compute_progressive(
+            self._get_shape(),
+            tuple(self.get_exact_boundaries()),
+            self.get_iterations(),
+            degree,
+        )
+
+    def _reuse_previous_views(self, shape, bounds, degree, settings):
+        # copy the largest overlap with a recent view on the same pixel grid,
+        # then only compute the strips around it
+        height, width = shape
+        best = None
+        for old_settings, old_shape, old_bounds, old_fractal in self._view_history:
+            if old_settings != settings:
+                continue
+            shift = grid_shift(old_shape, old_bounds, shape, bounds)
+            if shift is None:
+                continue
+            # overlap in new view coordinates
+            r0, c0 = max(0, -shift[0]), max(0, -shift[1])
+            r1 = min(height, old_shape[0] - shift[0])
+            c1 = min(width, old_shape[1] - shift[1])
+            area = max(0, r1 - r0) * max(0, c1 - c0)
+            if area and (best is None or area > best[0]):
+                best = (area, (r0, r1, c0, c1), shift, old_fractal)
+        if best is None:
+            return None
+
+        area, (r0, r1, c0, c1), shift, old_fractal = best
+        fractal = np.empty(shape, dtype=old_fractal.dtype)
+        fractal[r0:r1, c0:c1] = old_fractal[
+            r0 + shift[0] : r1 + shift[0], c0 + shift[1] : c1 + shift[1]
+        ]
+
+        x, y = grid_axes(shape, bounds)
+        strips = [
+            (slice(0, r0), slice(0, width)),  # top
+            (slice(r1, height), slice(0, width)),  # bottom
+            (slice(r0, r1), slice(0, c0)),  # left
+            (slice(r0, r1), slice(c1, width)),  # right
+        ]
+        for rows, cols in strips:
+            if rows.start < rows.stop and cols.start < cols.stop:
+                fractal[rows, cols] = self._active_renderer.compute_points(
+                    x[np.newaxis, cols],
+                    y[rows, np.newaxis],
+                    self.get_iterations(),
+                    degree,
+                )
+
+        self._last_reused_pixels = area
+        return fractal
+
+    def _get_engine_settings(self) -> tuple:
+        # settings that change the values of a rendered view
+        return (
+            self._current_use_complex,
+            self._current_in_place,
+            self._current_use_mask,
+            self._current_use_numba,
+            self._current_periodicity,
+            self._current_symmetry,  # may nudge the grid
+            self._current_subdivide,
+            self._current_deep_zoom,
+            self._current_compact,
+            self._current_threshold,
+            self._current_smooth,
+        )
+
+    def _get_shape(self) -> (int, int):
+        # renderers expect (height, width)
+        return (self._current_height, self._current_width)
+
+    def _update_renderer(self) -> None:
+        # pass values to active renderer (no setters though)
+        self._active_renderer.use_complex = self._current_use_complex
+        self._active_renderer.in_place = self._current_in_place
+        self._active_renderer.use_mask = self._current_use_mask
+        self._active_renderer.use_numba = self._current_use_numba
+        self._active_renderer.skip_interior = self._current_skip_interior
+        self._active_renderer.periodicity = self._current_periodicity
+        self._active_renderer.subdivide = self._current_subdivide
+        self._active_renderer.min_rect_size = self._current_min_rect_size
+        self._active_renderer.workers = self._current_workers
+        self._active_renderer.tile_size = self._current_tile_size
+        self._active_renderer.deep_zoom = self._current_deep_zoom
+        self._active_renderer.resumable = self._current_resumable
+        self._active_renderer.tile_cache = self._current_tile_cache
+        self._active_renderer.symmetry = self._current_symmetry
+        self._active_renderer.compact = self._current_compact
+        self._active_renderer.block_size = self._current_block_size
+        self._active_renderer.threshold = self._current_threshold
+        self._active_renderer.smooth = self._current_smooth
+        self._active_renderer.channels = self._current_channels
+        self._active_renderer.max_memory = self._current_max_memory
+        self._active_renderer.progress_callback = self._current_progress_callback
 
 
 def parse_arguments():
@@ -155,6 +578,26 @@ def parse_arguments():
             return False
         return argparse.ArgumentTypeError("Boolean value expected")
 
+    def str_to_block_size(input):
+        if input.lower() == "auto":
+            return "auto"
+        return int(input)
+
+    def str_to_memory(input):
+        # bytes, optionally with a K/M/G/T suffix (powers of 1024), e.g. 2G
+        units = {"K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+        suffix = input[-1:].upper()
+        if suffix in units:
+            return int(float(input[:-1]) * units[suffix])
+        return int(input)
+
+    def str_to_channels(input):
+        channels = tuple(name.strip() for name in input.split(",") if name.strip())
+        unknown = set(channels) - set(OUTPUT_CHANNELS)
+        if unknown:
+            raise argparse.ArgumentTypeError(f"Unknown channels: {sorted(unknown)}")
+        return channels
+
     parser.add_argument(
         "--use_complex", type=str_to_bool, help=f"Use Complex Mandelbrot. Default: True"
     )
@@ -164,6 +607,96 @@ def parse_arguments():
     parser.add_argument(
         "--use_mask", type=str_to_bool, help=f"Use Mask Mandelbrot. Default: False"
     )
+    parser.add_argument(
+        "--use_numba",
+        type=str_to_bool,
+        help=f"Use the compiled (Numba) per-pixel kernel. Default: False",
+    )
+    parser.add_argument(
+        "--skip_interior",
+        type=str_to_bool,
+        help=f"Skip cardioid/bulb interior pixels (degree 2). Default: False",
+    )
+    parser.add_argument(
+        "--periodicity",
+        type=str_to_bool,
+        help=f"Retire pixels whose orbit becomes periodic. Default: False",
+    )
+    parser.add_argument(
+        "--subdivide",
+        type=str_to_bool,
+        help=f"Mariani-Silver rendering (iterate borders, fill uniform rectangles). Default: False",
+    )
+    parser.add_argument(
+        "--min_rect_size",
+        type=int,
+        help=f"Smallest rectangle edge that is still subdivided. Default: 8",
+    )
+    parser.add_argument(
+        "--progressive",
+        type=str_to_bool,
+        help=f"Successive refinement (every 8th, 4th, 2nd, then every pixel). Default: False",
+    )
+    parser.add_argument(
+        "--deep_zoom",
+        type=str_to_bool,
+        help=f"Perturbation rendering (automatic for views beyond float64 precision). Default: False",
+    )
+    parser.add_argument(
+        "--resumable",
+        type=str_to_bool,
+        help=f"Keep the orbits so a higher iteration count only continues active pixels, not combinable with numba, tiling, workers, symmetry or periodicity. Default: False",
+    )
+    parser.add_argument(
+        "--state",
+        type=str,
+        help=f"Iteration state (.npz) to continue from and update, implies --resumable. Default: None",
+    )
+    parser.add_argument(
+        "--tile_cache",
+        type=str_to_bool,
+        help=f"Assemble quadtree-aligned views from cached tiles. Default: False",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        help=f"Directory of the on-disk tile store, implies --tile_cache. Default: None",
+    )
+    parser.add_argument(
+        "--cache_mb",
+        type=int,
+        help=f"Memory budget of the tile cache in MiB. Default: 256",
+    )
+    parser.add_argument(
+        "--reuse_views",
+        type=str_to_bool,
+        help=f"Copy pixels shared with recently rendered views (pans, Back). Default: True",
+    )
+    parser.add_argument(
+        "--symmetry",
+        type=str_to_bool,
+        help=f"Mirror rows across the real axis (nudges the grid by < 1/2 pixel if needed). Default: False",
+    )
+    parser.add_argument(
+        "--compact",
+        type=str_to_bool,
+        help=f"Iterate compacted arrays of the still active pixels (numpy engine). Default: False",
+    )
+    parser.add_argument(
+        "--smooth",
+        type=str_to_bool,
+        help=f"Continuous iteration counts (bailout 2^8, needs threshold >= 2). Default: False",
+    )
+    parser.add_argument(
+        "--channels",
+        type=str_to_channels,
+        help=f"Comma separated kernel outputs ({', '.join(OUTPUT_CHANNELS)}), saved as <output>_<name>.npy. Default: none",
+    )
+    parser.add_argument(
+        "--block_size",
+        type=str_to_block_size,
+        help=f"Iterations between escape checks (numpy engine), 'auto' adapts it, 0 disables. Default: 0",
+    )
 
     parser.add_argument(
         "--resolution",
@@ -172,22 +705,22 @@ def parse_arguments():
     )
     parser.add_argument(
         "--xmin",
-        type=float,
+        type=str,
         help=f"Minimum X-coordinate for the region of interest. Default: -2.0",
     )
     parser.add_argument(
         "--xmax",
-        type=float,
+        type=str,
         help=f"Maximum X-coordinate for the region of interest. Default: 2.0",
     )
     parser.add_argument(
         "--ymin",
-        type=float,
+        type=str,
         help=f"Minimum Y-coordinate for the region of interest. Default: -2.0",
     )
     parser.add_argument(
         "--ymax",
-        type=float,
+        type=str,
         help=f"Maximum Y-coordinate for the region of interest. Default: 2.0",
     )
     parser.add_argument(
@@ -196,9 +729,38 @@ def parse_arguments():
     parser.add_argument(
         "--threshold", type=float, help=f"Escape limit (threshold). Default: 2.0"
     )
+    parser.add_argument(
+        "--degree",
+        type=float,
+        help=f"Exponent d of z^d + c, integer or real (>= 1). Default: 2",
+    )
 
     parser.add_argument(
-        "--output", type=str, help=f"Name of .npy-output file. Default: 'fractal'"
+        "--workers",
+        type=int,
+        help=f"Number of worker processes for tiled rendering. Default: 1",
+    )
+    parser.add_argument(
+        "--tile-size",
+        type=int,
+        help=f"Edge length (pixels) of the render tiles. Default: 256 if --workers > 1, else no tiling",
+    )
+
+    parser.add_argument(
+        "--job",
+        type=str_to_bool,
+        help=f"Restartable batch job: tiles go into the output file as they finish, <output>.json lists them so a rerun skips them. Default: False",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=str_to_memory,
+        help=f"Memory budget (e.g. 512M, 2G) for streaming the view in row bands straight into the output file, workers share the bands. Not combinable with --channels, --progressive, --subdivide, --tile-size, --tile_cache or --job. Default: no limit",
+    )
+
+    parser.add_argument(
+        "--output",
+        type=str,
+        help=f"Name of .npy-output file (uint8/16/32 by iterations, float32 if smooth). Default: 'fractal'",
     )
 
     args = parser.parse_args()
@@ -211,6 +773,44 @@ def parse_arguments():
         params["in_place"] = args.in_place
     if args.use_mask is not None:
         params["use_mask"] = args.use_mask
+    if args.use_numba is not None:
+        params["use_numba"] = args.use_numba
+    if args.skip_interior is not None:
+        params["skip_interior"] = args.skip_interior
+    if args.periodicity is not None:
+        params["periodicity"] = args.periodicity
+    if args.subdivide is not None:
+        params["subdivide"] = args.subdivide
+    if args.min_rect_size is not None:
+        params["min_rect_size"] = args.min_rect_size
+    if args.progressive is not None:
+        params["progressive"] = args.progressive
+    if args.deep_zoom is not None:
+        params["deep_zoom"] = args.deep_zoom
+    if args.resumable is not None:
+        params["resumable"] = args.resumable
+    if args.state is not None:
+        params["state"] = args.state
+        params["resumable"] = True
+    if args.tile_cache is not None:
+        params["tile_cache"] = args.tile_cache
+    if args.cache_dir is not None:
+        params["cache_dir"] = args.cache_dir
+        params["tile_cache"] = True
+    if args.cache_mb is not None:
+        params["cache_mb"] = args.cache_mb
+    if args.reuse_views is not None:
+        params["reuse_views"] = args.reuse_views
+    if args.symmetry is not None:
+        params["symmetry"] = args.symmetry
+    if args.compact is not None:
+        params["compact"] = args.compact
+    if args.block_size is not None:
+        params["block_size"] = args.block_size
+    if args.smooth is not None:
+        params["smooth"] = args.smooth
+    if args.channels is not None:
+        params["channels"] = args.channels
 
     if args.resolution is not None:
         params["resolution"] = args.resolution
@@ -226,6 +826,17 @@ def parse_arguments():
         params["iterations"] = args.iterations
     if args.threshold is not None:
         params["threshold"] = args.threshold
+    if args.degree is not None:
+        # 3.0 -> 3, integer degrees use the exact multiplication chains
+        params["degree"] = int(args.degree) if args.degree.is_integer() else args.degree
+    if args.workers is not None:
+        params["workers"] = args.workers
+    if args.tile_size is not None:
+        params["tile_size"] = args.tile_size
+    if args.max_memory is not None:
+        params["max_memory"] = args.max_memory
+    if args.job is not None:
+        params["job"] = args.job
 
     if args.output is not None:
         params["output"] = args.output
@@ -242,11 +853,44 @@ if __name__ == "__main__":
     cmd_params = parse_arguments()
     # init computation with default + parsed arguments
     node_compute = ComputeApp(cmd_params)
-    # compute result
-    result = node_compute.recompute()
-    # save result
+    state_file = cmd_params.get("state")
+    if state_file and os.path.exists(state_file):
+        node_compute.load_iteration_state(state_file)
     output = cmd_params.get("output", "fractal")
     output = remove_npy_ending(output)  # in case user added file ending themself
-    np.save(f"{output}.npy", result)
+    job = cmd_params.get("job", False)
+    streamed = job or node_compute.get_max_memory() is not None
+    # compute result
+    if job:
+        result = node_compute.recompute_job(
+            f"{output}.npy", cmd_params.get("degree", 2)
+        )
+        stats = node_compute.get_job_stats()
+        print(
+            f"Computed {stats['computed']} of {stats['tiles']} tiles "
+            f"({stats['skipped']} done before), {stats['tiles_per_s']:.2f} tiles/s"
+        )
+    elif streamed:
+        # the bands go straight into the output file, the view never sits in RAM
+        result = node_compute.recompute_to_file(
+            f"{output}.npy", cmd_params.get("degree", 2)
+        )
+        stats = node_compute.get_last_stats()
+        print(f"Streamed {stats['bands']} bands of {stats['band_rows']} rows")
+    else:
+        result = node_compute.recompute(cmd_params.get("degree", 2))
+    if state_file:
+        node_compute.save_iteration_state(state_file)
+    if node_compute.get_tile_cache():
+        print(f"Tile cache: {node_compute.get_cache_stats()}")
+    if node_compute.get_subdivision()[0] and not streamed:
+        stats = node_compute.get_last_stats()
+        print(f"Iterated {stats['iterated']} pixels, filled {stats['filled']} pixels")
+    # save result
+    if not streamed:
+        np.save(f"{output}.npy", result)
 
     print(f"Saved fractal to {output}.npy")
+    for name, channel in node_compute.get_last_channels().items():
+        np.save(f"{output}_{name}.npy", channel)
+        print(f"Saved {name} channel to {output}_{name}.npy")
@@ -16,6 +16,7 @@ from PyQt5.QtWidgets import (
     QSpinBox,
     QDoubleSpinBox,
     QLineEdit,
+    QProgressBar,
 )
 from PyQt5.QtCore import Qt, QTimer
 import matplotlib as plt
@@ -28,6 +29,20 @@ from videos import VideoApp
 from utils import my_cmap
 from typing import Any
 import argparse
+from contextlib import contextmanager
+
+
+class QtProgress:
+    """Progress consumer (see mandel_progress) driving a QProgressBar"""
+
+    def __init__(self, bar: QProgressBar):
+        self.bar = bar
+
+    def __call__(self, iteration, total, live, elapsed):
+        self.bar.setMaximum(total)
+        self.bar.setValue(iteration)
+        self.bar.setFormat(f"%p% ({live} live, {elapsed:.1f} s)")
+        QApplication.processEvents()  # the calculation blocks the event loop
 
 
 class MandelbrotExplorer(QMainWindow):
@@ -60,7 +75,11 @@ class MandelbrotExplorer(QMainWindow):
         self.roi_history = []
         self.max_history_depth = 10
 
+        # set by controls_disabled while a render runs
+        self.rendering = False
+
         self.init_ui()
+        self.node_compute.set_progress_callback(QtProgress(self.progress_bar))
 
         self.add_roi_to_history()
 
@@ -143,14 +162,34 @@ class MandelbrotExplorer(QMainWindow):
         layout = QVBoxLayout()
         self.inplace_checkbox = QCheckBox("Inplace")
         self.masking_checkbox = QCheckBox("Masking")
+        self.numba_checkbox = QCheckBox("Numba JIT")
+        self.progressive_checkbox = QCheckBox("Progressive")
+        self.resume_checkbox = QCheckBox("Resume iterations")
+        self.cache_checkbox = QCheckBox("Tile cache")
+        self.smooth_checkbox = QCheckBox("Smooth counts")
+        self.z_channel_checkbox = QCheckBox("Kernel Z channel")
         self.inplace_checkbox.setChecked(self.node_compute.get_computation_methods()[1])
         self.masking_checkbox.setChecked(self.node_compute.get_computation_methods()[2])
+        self.numba_checkbox.setChecked(self.node_compute.get_computation_methods()[3])
+        self.progressive_checkbox.setChecked(self.node_compute.get_progressive())
+        self.resume_checkbox.setChecked(self.node_compute.get_resumable())
+        self.cache_checkbox.setChecked(self.node_compute.get_tile_cache())
+        self.smooth_checkbox.setChecked(self.node_compute.get_smooth())
+        self.z_channel_checkbox.setChecked("z" in self.node_compute.get_channels())
         layout.addWidget(self.inplace_checkbox)
         layout.addWidget(self.masking_checkbox)
+        layout.addWidget(self.numba_checkbox)
+        layout.addWidget(self.progressive_checkbox)
+        layout.addWidget(self.resume_checkbox)
+        layout.addWidget(self.cache_checkbox)
+        layout.addWidget(self.smooth_checkbox)
+        layout.addWidget(self.z_channel_checkbox)
         group_box.setLayout(layout)
         self.control_layout.addWidget(group_box)
 
         # Connect signals
+        self.resume_checkbox.toggled.connect(self.handler_resume)
+        self.handler_resume(self.resume_checkbox.isChecked())
         # self.inplace_checkbox.toggled.connect(self.handler_functionalities)
         # self.masking_checkbox.toggled.connect(self.handler_functionalities)
 
@@ -271,6 +310,10 @@ class MandelbrotExplorer(QMainWindow):
         self.control_layout.addLayout(action_layout)
         # self.control_layout.addStretch(1) # Push everything to the top
 
+        # filled by the progress events of the renderer
+        self.progress_bar = QProgressBar()
+        self.control_layout.addWidget(self.progress_bar)
+
         # Connect buttons
         self.recompute_btn.clicked.connect(self.handler_draw)
         self.redraw_btn.clicked.connect(self.handler_postprocessing)
@@ -309,7 +352,7 @@ class MandelbrotExplorer(QMainWindow):
 
         # Custom degree input from user
         self.degree_input = QLineEdit()
-        self.degree_input.setPlaceholderText("Enter degree (e.g. 5)")
+        self.degree_input.setPlaceholderText("Enter degree (e.g. 5 or 2.5)")
         self.degree_input.setFixedWidth(100)
 
         self.custom_degree_btn = QPushButton("Generate")
@@ -659,9 +702,19 @@ class MandelbrotExplorer(QMainWindow):
         self.active_renderer.set_resolution(
             self.get_current_width(), self.get_current_height()
         )
+        self.active_renderer.set_progress_callback(QtProgress(self.progress_bar))
+        self.progress_bar.show()
+        self.active_renderer.warm_up()
 
         self.recalculate_image()
 
+    def handler_resume(self, checked) -> None:
+        """Resumed renders run their own plain pass, without numba or tile cache"""
+        for checkbox in (self.numba_checkbox, self.cache_checkbox):
+            if checked:
+                checkbox.setChecked(False)
+            checkbox.setEnabled(not checked)
+
     def handler_functionalities(self) -> None:
         """Handler for functionalities checkboxes"""
         inplace = self.inplace_checkbox.isChecked()
@@ -694,6 +747,12 @@ class MandelbrotExplorer(QMainWindow):
 
         self.inplace_checkbox.setChecked(False)  # TODO rework
         self.masking_checkbox.setChecked(False)  # TODO rework
+        self.numba_checkbox.setChecked(False)  # TODO rework
+        self.progressive_checkbox.setChecked(False)  # TODO rework
+        self.resume_checkbox.setChecked(False)  # TODO rework
+        self.cache_checkbox.setChecked(False)  # TODO rework
+        self.smooth_checkbox.setChecked(False)  # TODO rework
+        self.z_channel_checkbox.setChecked(False)  # TODO rework
         self.complex_yes_radio.setChecked(
             True
         )  # Set active renderer to complex #TODO rework
@@ -715,6 +774,14 @@ class MandelbrotExplorer(QMainWindow):
             use_complex=self.complex_yes_radio.isChecked(),
             in_place=self.inplace_checkbox.isChecked(),
             use_mask=self.masking_checkbox.isChecked(),
+            use_numba=self.numba_checkbox.isChecked(),
+        )
+        self.node_compute.set_progressive(self.progressive_checkbox.isChecked())
+        self.node_compute.set_resumable(self.resume_checkbox.isChecked())
+        self.node_compute.set_tile_cache(self.cache_checkbox.isChecked())
+        self.node_compute.set_smooth(self.smooth_checkbox.isChecked())
+        self.node_compute.set_channels(
+            ("z",) if self.z_channel_checkbox.isChecked() else ()
         )
 
         self.node_compute.set_resolution(self.get_input_resolution())
@@ -742,9 +809,11 @@ class MandelbrotExplorer(QMainWindow):
 
     def handle_custom_degree_input(self):
         try:
-            degree = int(self.degree_input.text())
-            if degree < 2:
+            degree = float(self.degree_input.text())
+            if not degree >= 2:
                 raise ValueError("Degree must be >= 2")
+            # integer degrees stay int (multiplication chains), others are real
+            degree = int(degree) if degree.is_integer() else degree
             self.current_degree = degree
             self.recalculate_image(degree)
         except ValueError:
@@ -760,11 +829,43 @@ class MandelbrotExplorer(QMainWindow):
             self.get_input_cycles()
         )  # update cycles before modifying
         self.current_fractal_modified = self.node_colorize.modify_fractal(
-            self.current_fractal, self.node_compute.get_iterations()
+            self.current_fractal,
+            self.node_compute.get_iterations(),
+            self.node_compute.get_last_channels(),
         )
 
+    @contextmanager
+    def controls_disabled(self):
+        """No clicks or zooms while a render runs the event loop (progress events)"""
+        if self.rendering:  # nested render, the outermost one re-enables
+            yield
+            return
+        self.rendering = True
+        widgets = (self.control_panel, self.video_panel, self.canvas)
+        for widget in widgets:
+            widget.setEnabled(False)
+        try:
+            yield
+        finally:
+            for widget in widgets:
+                widget.setEnabled(True)
+            self.rendering = False
+
     def recalculate_image(self, degree=2) -> None:
         """Recalculates and displays the image"""
+        with self.controls_disabled():
+            self._recalculate_image(degree)
+
+    def _recalculate_image(self, degree) -> None:
+        if self.node_compute.get_progressive():
+            # show every refinement level while the next one is computed
+            for _, fractal in self.node_compute.recompute_progressive(degree):
+                self.current_fractal = fractal
+                self.modify_fractal()
+                self.set_image()
+                QApplication.processEvents()
+            return
+
         self.current_fractal = self.node_compute.recompute(degree)
         self.modify_fractal()
         self.set_image()
@@ -1078,6 +1179,11 @@ class MandelbrotExplorer(QMainWindow):
 
     
     def handler_render_preview(self):
+        """Handler to render a preview of the last frame"""
+        with self.controls_disabled():
+            self._render_preview()
+
+    def _render_preview(self):
         # render & display a small preview of the last frame with current settings
         if (
             self.frame_num_input.value() == 1
@@ -1120,6 +1226,10 @@ class MandelbrotExplorer(QMainWindow):
 
     def handler_render_frames(self):
         """Handler to initiate render process"""
+        with self.controls_disabled():
+            self._render_frames()
+
+    def _render_frames(self):
 
         # fallback renderer, if only 1 frame is to be rendered (no need to make any setup steps)
         if (
@@ -1205,6 +1315,11 @@ def parse_arguments():
     parser.add_argument(
         "--use_mask", type=str_to_bool, help=f"Use Mask Mandelbrot. Default: False"
     )
+    parser.add_argument(
+        "--use_numba",
+        type=str_to_bool,
+        help=f"Use the compiled (Numba) per-pixel kernel. Default: False",
+    )
 
     parser.add_argument(
         "--resolution",
@@ -1255,6 +1370,8 @@ def parse_arguments():
         params["in_place"] = args.in_place
     if args.use_mask is not None:
         params["use_mask"] = args.use_mask
+    if args.use_numba is not None:
+        params["use_numba"] = args.use_numba
 
     if args.resolution is not None:
         params["resolution"] = args.resolution
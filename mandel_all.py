@@ -1,193 +1,1228 @@
-import tensorflow as tf
+import copy
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from mandel_cache import ROOT_MIN, quadtree_alignment
+from mandel_interior import interior_periods
+from mandel_perturbation import compute_perturbation, needs_deep_zoom
+from mandel_progress import ProgressReporter, null_progress
+from mandel_resume import IterationState
+from mandel_symmetry import symmetric_rows
+
+
+DEFAULT_TILE_SIZE = 256
+DEFAULT_MIN_RECT_SIZE = 8
+REFINEMENT_STEPS = (8, 4, 2, 1)
+# smooth mode iterates escaped pixels on up to this radius
+SMOOTH_BAILOUT = 2.0**8
+# compute(channels=...) names, values are taken when a pixel escapes (or
+# at the end): |z|^2, z, dz/dc (distance estimation), min |z| over the orbit.
+# Single precision is plenty for coloring, only dz/dc exceeds its range
+OUTPUT_CHANNELS = {
+    "abs2": np.float32,
+    "z": np.complex64,
+    "dzdc": np.complex128,
+    "trap": np.float32,
+}
+# streaming: peak work buffers of the numpy engines per pixel (c, z, powers,
+# masks, compaction copies; measured up to ~150 with periodicity), sets the
+# band height for a memory budget
+STREAM_BYTES_PER_PIXEL = 160
+DEFAULT_MAX_MEMORY = 256 * 2**20
+# blocked iteration: first K of block_size="auto" and its upper limit
+DEFAULT_BLOCK_SIZE = 8
+MAX_BLOCK_SIZE = 64
+
+
+def grid_axes(shape, bounds):
+    """Returns the x (width) and y (height) coordinate vectors of a view"""
+    height, width = shape
+    x_min, x_max, y_min, y_max = (float(b) for b in bounds)
+    return np.linspace(x_min, x_max, width), np.linspace(y_min, y_max, height)
+
+
+def count_dtype(maxiter, smooth=False):
+    """Smallest dtype holding escape times 0..maxiter, float32 for smooth counts"""
+    if smooth:
+        return np.float32
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if maxiter <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def _compute_tile(calculator, x, y, maxiter, degree):
+    # runs inside a worker process, so it has to live on module level (pickling)
+    return calculator._compute_points(
+        x[np.newaxis, :], y[:, np.newaxis], maxiter, degree
+    )
+
+
+# calculator of a pool worker process, set once by _init_worker
+_worker_calculator = None
+
+
+def _init_worker(calculator):
+    global _worker_calculator
+    _worker_calculator = calculator
+
+
+def _compute_worker_tile(x, y, maxiter, degree):
+    return _compute_tile(_worker_calculator, x, y, maxiter, degree)
+
+
+def _worker_pool(calculator):
+    # spawned, not forked: forking after numba started its threading layer
+    # hangs the interpreter. The calculator is sent once per worker, without
+    # tile cache and iteration state which only the parent uses
+    light = copy.copy(calculator)
+    light.tile_cache = None
+    light.iteration_state = None
+    light.last_stats = {}
+    light.progress_callback = null_progress  # only the parent reports
+    return ProcessPoolExecutor(
+        max_workers=calculator.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(light,),
+    )
+
+
+def _check_degree(degree):
+    # integral degrees (also 3.0) run addition chains, others the polar form
+    if not degree >= 1:
+        raise ValueError("Unsupported degree")
+    return int(degree) if int(degree) == degree else float(degree)
+
+
+def _addition_chain(degree):
+    # left-to-right binary method: after z^1, every further bit of the
+    # exponent squares, set bits also multiply by z (z^5: square, square, *z)
+    return [bit == "1" for bit in bin(degree)[3:]]
+
+
+def _split_power(zr, zi, pr, pi, t1, t2, degree, where):
+    # (pr + i pi) = (zr + i zi)^degree for integer degrees, t1 and t2 are
+    # scratch buffers
+    np.copyto(pr, zr, **where)
+    np.copyto(pi, zi, **where)
+    for multiply in _addition_chain(degree):
+        np.multiply(pr, pi, out=t1, **where)
+        np.add(t1, t1, out=t1, **where)  # new imaginary part
+        np.multiply(pi, pi, out=t2, **where)
+        np.multiply(pr, pr, out=pr, **where)
+        np.subtract(pr, t2, out=pr, **where)
+        np.copyto(pi, t1, **where)
+        if multiply:
+            np.multiply(pr, zi, out=t1, **where)
+            np.multiply(pi, zr, out=t2, **where)
+            np.add(t1, t2, out=t1, **where)
+            np.multiply(pi, zi, out=t2, **where)
+            np.multiply(pr, zr, out=pr, **where)
+            np.subtract(pr, t2, out=pr, **where)
+            np.copyto(pi, t1, **where)
+
+
+def _split_polar_power(zr, zi, sr, si, pr, pi, degree, where):
+    # (pr + i pi) = |z|^degree * e^(i degree arg z) for real degrees, sr and si
+    # hold zr^2 and zi^2 (the squares of the escape test), then are scratch
+    np.arctan2(zi, zr, out=pi, **where)
+    np.multiply(pi, degree, out=pi, **where)
+    np.add(sr, si, out=pr, **where)
+    np.power(pr, degree / 2, out=pr, **where)
+    np.sin(pi, out=si, **where)
+    np.cos(pi, out=sr, **where)
+    np.multiply(pr, si, out=pi, **where)
+    np.multiply(pr, sr, out=pr, **where)
+
+
+def _complex_power(z, out, degree, where):
+    # out = z^degree on complex arrays, out may only be z itself for degree 2
+    if isinstance(degree, float):
+        mag2 = z.real * z.real + z.imag * z.imag
+        angle = np.arctan2(z.imag, z.real) * degree
+        np.power(mag2, degree / 2, out=mag2)
+        np.multiply(mag2, np.sin(angle), out=out.imag, **where)
+        np.multiply(mag2, np.cos(angle), out=out.real, **where)
+        return
+    np.copyto(out, z, **where)
+    for multiply in _addition_chain(degree):
+        np.multiply(out, out, out=out, **where)
+        if multiply:
+            np.multiply(out, z, out=out, **where)
+
+
+class _PeriodicityCheck:
+    """Brent-style cycle detection on split real/imag planes.
+
+    The orbit is compared against a value saved at iterations 1, 2, 4, 8, ...
+    A pending pixel that comes back within eps of it is periodic (interior).
+    Only the still pending pixels are tracked (as flat indices), so the cost
+    per iteration shrinks together with them.
+    """
+
+    def __init__(self, shape, eps, maxiter):
+        self.eps2 = eps * eps
+        self.saved_at = -1  # z_0 = 0 is the first saved value
+        self.next_save = 1
+        self.found = np.zeros(shape, dtype=bool)
+        self.period = np.zeros(shape, dtype=count_dtype(maxiter))
+        self._idx = None  # flat indices of tracked pixels
+        self._saved_re = None
+        self._saved_im = None
+
+    @property
+    def remaining(self):
+        return self.found.size if self._idx is None else self._idx.size
+
+    def check(self, i, zr, zi, pending):
+        """Removes pixels that closed a cycle from pending (in place)"""
+        pending_flat = pending.reshape(-1)
+        if self._idx is None:
+            self._idx = np.flatnonzero(pending_flat)
+            self._saved_re = np.zeros(self._idx.size)
+            self._saved_im = np.zeros(self._idx.size)
+
+        idx = self._idx
+        zr_live = zr.reshape(-1)[idx]
+        zi_live = zi.reshape(-1)[idx]
+        dr = zr_live - self._saved_re
+        di = zi_live - self._saved_im
+        hit = dr * dr + di * di < self.eps2
+        keep = pending_flat[idx]
+        hit &= keep
+
+        if hit.any():
+            found = idx[hit]
+            self.found.reshape(-1)[found] = True
+            self.period.reshape(-1)[found] = i - self.saved_at
+            pending_flat[found] = False
+            keep &= ~hit
+
+        if not keep.all():
+            idx, zr_live, zi_live = idx[keep], zr_live[keep], zi_live[keep]
+            if i != self.next_save:
+                self._saved_re = self._saved_re[keep]
+                self._saved_im = self._saved_im[keep]
+            self._idx = idx
+
+        if i == self.next_save:
+            self._saved_re = zr_live
+            self._saved_im = zi_live
+            self.saved_at = i
+            self.next_save *= 2
 
 
 class MandelbrotCalculator:
-    def __init__(self, use_complex=True, in_place=False, use_mask=False):
+    def __init__(
+        self,
+        use_complex=True,
+        in_place=False,
+        use_mask=False,
+        workers=1,
+        tile_size=None,
+        use_numba=False,
+        skip_interior=False,
+        periodicity=False,
+        periodicity_eps=1e-10,
+        return_period=False,
+        subdivide=False,
+        min_rect_size=DEFAULT_MIN_RECT_SIZE,
+        deep_zoom=False,
+        resumable=False,
+        tile_cache=None,
+        symmetry=False,
+        compact=False,
+        block_size=None,
+        threshold=2.0,
+        smooth=False,
+        channels=(),
+        max_memory=None,
+        progress_callback=null_progress,
+    ):
         self.use_complex = use_complex
         self.in_place = in_place
         self.use_mask = use_mask
+        # compiled per-pixel backend, takes precedence over the numpy paths
+        self.use_numba = use_numba
+        # numpy engine on compacted 1-D arrays of the live pixels
+        self.compact = compact
+        # K bare iterations between escape checks (int or "auto"), escapes
+        # inside a block are re-run for their exact iteration
+        self.block_size = block_size
+        # escape radius, smooth returns continuous (float) counts normalised to
+        # it, computed in-kernel from orbits iterated on to SMOOTH_BAILOUT
+        self.threshold = threshold
+        self.smooth = smooth
+        # names of OUTPUT_CHANNELS, compute then also returns a dict of them
+        self.channels = channels
+        # analytic cardioid/bulb pre-pass (degree 2 only)
+        self.skip_interior = skip_interior
+        # orbit cycle detection retires interior pixels early, return_period
+        # makes compute return (div_time, period) with period 0 = not detected
+        self.periodicity = periodicity
+        self.periodicity_eps = periodicity_eps
+        self.return_period = return_period
+        # tiled execution: workers > 1 spreads the tiles over a process pool
+        self.workers = workers
+        self.tile_size = tile_size
+        # Mariani-Silver: only iterate rectangle borders, fill uniform ones
+        self.subdivide = subdivide
+        self.min_rect_size = min_rect_size
+        # perturbation against a high-precision reference orbit, also used
+        # automatically once the view is too narrow for float64 coordinates
+        self.deep_zoom = deep_zoom
+        # keep the orbits of the last view so a higher maxiter only continues
+        # the pixels that are still active, a plain pass of its own: compute
+        # raises a ValueError for accelerations, tiling, symmetry or periods
+        self.resumable = resumable
+        self.iteration_state = None
+        # TileCache: aligned views are assembled from cached quadtree tiles
+        self.tile_cache = tile_cache
+        # views straddling the real axis only compute one half and mirror it,
+        # the grid is nudged by less than half a pixel if rows do not pair up
+        self.symmetry = symmetry
+        # byte budget of the work buffers: views are computed in horizontal
+        # bands of as many rows as fit, see also compute_to_file
+        self.max_memory = max_memory
+        # callback(iteration, total, live, elapsed) of every engine pass (see
+        # mandel_progress), tiles and bands each report a pass of their own
+        self.progress_callback = progress_callback
+        # pixel counts of the last subdivided render
+        self.last_stats = {}
+
+    def compute(self, shape, bounds, maxiter, degree=2):
+        """Escape times of a view, bounds may be strings/Decimals for deep zooms.
+
+        With channels set, a dict of the requested OUTPUT_CHANNELS is returned
+        as the last element, e.g. (div_time, {"z": ...}). Deep zooms have no
+        channels, their dict is empty.
+
+        max_memory bands the view (deep zooms excepted), it raises a ValueError
+        together with channels, subdivide, tile_size or tile_cache.
+        """
+        self._check_banded()
+        if self.deep_zoom or needs_deep_zoom(shape, bounds):
+            # integer counts, also in smooth mode
+            div_time = compute_perturbation(
+                shape, bounds, maxiter, degree, self.threshold
+            )
+            channels = {} if self.channels else None
+            return self._result(div_time.astype(count_dtype(maxiter)), None, channels)
+
+        if self.channels:
+            # per-pixel orbit data: no guessing, filling, mirroring or caching
+            return self._result(*self._compute_channels(shape, bounds, maxiter, degree))
+
+        if self.resumable and not self.smooth:
+            # stored orbits stop at the escape radius, smooth needs the bailout
+            self._check_resumable()
+            div_time = self._compute_resumed(shape, bounds, maxiter, degree)
+            return self._result(div_time, None)
+
+        if self.symmetry:
+            plan = symmetric_rows(bounds[2], bounds[3], shape[0])
+            if plan is not None:
+                result = self._compute_mirrored(shape, bounds, plan, maxiter, degree)
+                return self._result(*result)
+
+        return self._result(*self._compute_view(shape, bounds, maxiter, degree))
+
+    def compute_to_file(self, path, shape, bounds, maxiter, degree=2):
+        """Streams the escape times of a view into a .npy file, band by band.
+
+        The work buffers of all bands in flight (one per worker) stay within
+        max_memory (default DEFAULT_MAX_MEMORY), so views larger than RAM can
+        be rendered. Cycle lengths are not kept. Returns the file as a
+        read/write memmap.
+        """
+        if self.deep_zoom or needs_deep_zoom(shape, bounds):
+            raise ValueError("Streaming needs float64 coordinates, not a deep zoom")
+        self._check_banded()
+        div_time = np.lib.format.open_memmap(
+            path, mode="w+", dtype=self._count_dtype(maxiter), shape=tuple(shape)
+        )
+        self._compute_banded(shape, bounds, maxiter, degree, div_time, None)
+        div_time.flush()
+        return div_time
+
+    def _compute_view(self, shape, bounds, maxiter, degree):
+        if self.tile_cache is not None and not self.return_period:
+            tile_size = self.tile_size or DEFAULT_TILE_SIZE
+            alignment = quadtree_alignment(shape, bounds, tile_size)
+            if alignment is not None:
+                return self._compute_cached(shape, alignment, maxiter, degree), None
+
+        if self.max_memory:
+            div_time = np.empty(shape, dtype=self._count_dtype(maxiter))
+            period = self._period_buffer(shape, maxiter)
+            return self._compute_banded(
+                shape, bounds, maxiter, degree, div_time, period
+            )
+        if self.subdivide:
+            return self._compute_subdivided(shape, bounds, maxiter, degree)
+        if self.workers > 1 or self.tile_size:
+            return self._compute_tiled(shape, bounds, maxiter, degree)
+
+        x, y = grid_axes(shape, bounds)
+        return self._compute_points(x[np.newaxis, :], y[:, np.newaxis], maxiter, degree)
+
+    def _compute_mirrored(self, shape, bounds, plan, maxiter, degree):
+        y_min, y_max, first, last, source = plan
+        pitch = (y_max - y_min) / (shape[0] - 1)
+        block_bounds = (
+            bounds[0],
+            bounds[1],
+            y_min + first * pitch,
+            y_min + last * pitch,
+        )
+        div_time, period = self._compute_view(
+            (last - first + 1, shape[1]), block_bounds, maxiter, degree
+        )
+        return div_time[source], None if period is None else period[source]
+
+    def compute_refined(self, shape, bounds, maxiter, degree=2):
+        """Blocking variant of compute_progressive, returns the final level"""
+        for _, result in self.compute_progressive(shape, bounds, maxiter, degree):
+            pass
+        return result
+
+    def compute_progressive(self, shape, bounds, maxiter, degree=2):
+        """Successive refinement ("solid guessing"), yields (step, image) per level.
+
+        Every 8th, 4th, 2nd and finally every pixel is determined. A new pixel
+        is only iterated if the already known corners of its coarse cell
+        disagree, otherwise it copies their value. Intermediate images are
+        filled from the nearest known pixel so they can be displayed directly.
+        Features thinner than the coarse grid can be missed by the guessing.
+        """
+        if self.max_memory:
+            raise ValueError("max_memory can't be combined with progressive rendering")
+        if self.deep_zoom or needs_deep_zoom(shape, bounds):
+            # the perturbation engine has no coarse levels, render in one go
+            yield 1, self.compute(shape, bounds, maxiter, degree)
+            return
+
+        height, width = shape
+        x, y = grid_axes(shape, bounds)
+        div_time = np.zeros(shape, dtype=self._count_dtype(maxiter))
+        period = self._period_buffer(shape, maxiter)
+        stats = {"iterated": 0, "filled": 0}
+
+        def known_indices(step, size):
+            # multiples of step, the last row/column is always part of the grid
+            return np.union1d(np.arange(0, size, step), [size - 1])
+
+        def coarse_neighbours(idx, step, size):
+            # enclosing indices on the previous (2 * step) grid
+            lower = idx // (2 * step) * (2 * step)
+            return lower, np.minimum(lower + 2 * step, size - 1)
+
+        def evaluate(rows, cols):
+            d, p = self._compute_points(x[cols], y[rows], maxiter, degree)
+            div_time[rows, cols] = d
+            if period is not None:
+                period[rows, cols] = p
+            stats["iterated"] += rows.size
+
+        def preview(step):
+            # nearest known pixel towards the top-left corner
+            rows = known_indices(step, height)
+            cols = known_indices(step, width)
+            row_map = rows[np.searchsorted(rows, np.arange(height), side="right") - 1]
+            col_map = cols[np.searchsorted(cols, np.arange(width), side="right") - 1]
+            grid = np.ix_(row_map, col_map)
+            return self._result(
+                div_time[grid], period[grid] if period is not None else None
+            )
+
+        for level, step in enumerate(REFINEMENT_STEPS):
+            rows = known_indices(step, height)
+            cols = known_indices(step, width)
+            rr, cc = np.meshgrid(rows, cols, indexing="ij")
+
+            if level == 0:
+                evaluate(rr.ravel(), cc.ravel())
+            else:
+                # only pixels that are new on this level
+                new = ~(
+                    np.isin(rr, known_indices(2 * step, height))
+                    & np.isin(cc, known_indices(2 * step, width))
+                )
+                rr, cc = rr[new], cc[new]
+                r0, r1 = coarse_neighbours(rr, step, height)
+                c0, c1 = coarse_neighbours(cc, step, width)
+
+                value = div_time[r0, c0]
+                agree = (
+                    (div_time[r0, c1] == value)
+                    & (div_time[r1, c0] == value)
+                    & (div_time[r1, c1] == value)
+                )
+                if period is not None:
+                    p = period[r0, c0]
+                    agree &= (
+                        (period[r0, c1] == p)
+                        & (period[r1, c0] == p)
+                        & (period[r1, c1] == p)
+                    )
+                    period[rr[agree], cc[agree]] = p[agree]
+
+                div_time[rr[agree], cc[agree]] = value[agree]
+                stats["filled"] += int(agree.sum())
+                evaluate(rr[~agree], cc[~agree])
+
+            self.last_stats = stats
+            yield step, preview(step)
+
+    def compute_points(self, cx, cy, maxiter, degree=2):
+        """Computes the escape times for arbitrary (broadcastable) c = cx + i*cy"""
+        return self._result(*self._compute_points(cx, cy, maxiter, degree))
+
+    def _result(self, div_time, period, channels=None):
+        result = (div_time, period) if self.return_period else (div_time,)
+        if channels is not None:
+            result += (channels,)
+        return result if len(result) > 1 else div_time
+
+    def _compute_channels(self, shape, bounds, maxiter, degree):
+        unknown = set(self.channels) - set(OUTPUT_CHANNELS)
+        if unknown:
+            raise ValueError(f"Unknown output channels: {sorted(unknown)}")
+        size = shape[0] * shape[1]
+        outputs = {
+            name: np.empty(size, dtype=OUTPUT_CHANNELS[name]) for name in self.channels
+        }
+        x, y = grid_axes(shape, bounds)
+        div_time, period = self._compute_compact(
+            x[np.newaxis, :], y[:, np.newaxis], maxiter, degree, outputs
+        )
+        channels = {name: values.reshape(shape) for name, values in outputs.items()}
+        return div_time, period, channels
+
+    def _compute_points(self, cx, cy, maxiter, degree):
+        # always returns (div_time, period), period is None if not requested
+        if self.skip_interior and degree == 2 and self.threshold >= 2:
+            cx, cy = np.broadcast_arrays(cx, cy)
+            known = interior_periods(cx, cy)
+            if known.any():
+                # interior pixels never escape, only iterate the rest
+                outside = known == 0
+                div_time = np.full(cx.shape, maxiter, dtype=self._count_dtype(maxiter))
+                div_time[outside], period = self._compute_engine(
+                    cx[outside], cy[outside], maxiter, degree
+                )
+                if period is not None:
+                    known = known.astype(count_dtype(maxiter))
+                    known[outside] = period
+                    period = known
+                return div_time, period
+
+        return self._compute_engine(cx, cy, maxiter, degree)
+
+    def _compute_engine(self, cx, cy, maxiter, degree):
+        if self.use_numba:
+            # imported lazily, numba is an optional dependency
+            from mandel_numba import compute_numba
+
+            bailout = self._smooth_constants(degree)[0] if self.smooth else 0.0
+            div_time, period = compute_numba(
+                cx,
+                cy,
+                maxiter,
+                degree,
+                periodicity_eps=self.periodicity_eps if self.periodicity else 0.0,
+                return_period=True,
+                threshold=self.threshold,
+                bailout=bailout,
+            )
+            div_time = div_time.astype(self._count_dtype(maxiter), copy=False)
+            # compiled loop, only its end is reported
+            self._progress(maxiter).finish(np.count_nonzero(div_time == maxiter))
+            if not self.periodicity:
+                return div_time, None
+            return div_time, period.astype(count_dtype(maxiter), copy=False)
+
+        if self._blocked():
+            return self._compute_blocked(cx, cy, maxiter, degree)
+        if self.compact or self.smooth:
+            # continuous counts need orbits past maxiter, only compact does that
+            return self._compute_compact(cx, cy, maxiter, degree)
 
-    def compute(self, *args, **kwargs):
         if self.use_complex:
             if self.in_place:
-                return self._compute_complex_in_place(*args, **kwargs)
+                return self._compute_complex_in_place(cx, cy, maxiter, degree)
             else:
-                return self._compute_complex(*args, **kwargs)
+                return self._compute_complex(cx, cy, maxiter, degree)
         else:
             if self.in_place:
-                return self._compute_nocomplex_in_place(*args, **kwargs)
+                return self._compute_nocomplex_in_place(cx, cy, maxiter, degree)
             else:
-                return self._compute_nocomplex(*args, **kwargs)
+                return self._compute_nocomplex(cx, cy, maxiter, degree)
 
-    def _compute_complex(self, shape, bounds, maxiter, degree=2):
-        import numpy as np
+    def _blocked(self):
+        # cycle detection needs a check every iteration, and below radius 2
+        # escaped orbits may come back inside
+        return (
+            self.block_size
+            and not self.periodicity
+            and not self.smooth
+            and self.threshold >= 2
+        )
 
+    def _progress(self, maxiter):
+        return ProgressReporter(self.progress_callback, maxiter)
+
+    def _count_dtype(self, maxiter):
+        return count_dtype(maxiter, self.smooth)
+
+    def _period_buffer(self, shape, maxiter):
+        # cycle lengths are below maxiter as well, None without periodicity
+        if not self.periodicity:
+            return None
+        return np.zeros(shape, dtype=count_dtype(maxiter))
+
+    def _compute_tiled(self, shape, bounds, maxiter, degree):
         height, width = shape
-        x_min, x_max, y_min, y_max = bounds
-        y, x = np.ogrid[y_min : y_max : height * 1j, x_min : x_max : width * 1j]
-        c = x + 1j * y
-        z = np.zeros_like(c)
-        div_time = maxiter + np.zeros(z.shape, dtype=int)
+        tile_size = self.tile_size or DEFAULT_TILE_SIZE
+        # every tile gets a slice of the same axis vectors as the single-process
+        # path, so the result is bit-identical to it
+        x, y = grid_axes(shape, bounds)
+        div_time = np.empty(shape, dtype=self._count_dtype(maxiter))
+        period = self._period_buffer(shape, maxiter)
+        tiles = [
+            (y0, x0)
+            for y0 in range(0, height, tile_size)
+            for x0 in range(0, width, tile_size)
+        ]
 
-        for i in range(maxiter):
-            z = z**degree + c
-            mask = np.abs(z) > 2
-            div_now = mask & (div_time == maxiter)
-            div_time[div_now] = i
-            z[mask] = 2
+        def tile_args(y0, x0):
+            return (
+                x[x0 : x0 + tile_size],
+                y[y0 : y0 + tile_size],
+                maxiter,
+                degree,
+            )
 
-        return div_time
+        if self.workers > 1:
+            with _worker_pool(self) as executor:
+                futures = {
+                    executor.submit(_compute_worker_tile, *tile_args(y0, x0)): (y0, x0)
+                    for y0, x0 in tiles
+                }
+                results = (
+                    (futures[future], future.result())
+                    for future in as_completed(futures)
+                )
+                for (y0, x0), (tile, tile_period) in results:
+                    rows = slice(y0, y0 + tile.shape[0])
+                    cols = slice(x0, x0 + tile.shape[1])
+                    div_time[rows, cols] = tile
+                    if period is not None:
+                        period[rows, cols] = tile_period
+        else:
+            for y0, x0 in tiles:
+                tile, tile_period = _compute_tile(self, *tile_args(y0, x0))
+                rows = slice(y0, y0 + tile.shape[0])
+                cols = slice(x0, x0 + tile.shape[1])
+                div_time[rows, cols] = tile
+                if period is not None:
+                    period[rows, cols] = tile_period
 
-    def _compute_complex_in_place(self, shape, bounds, maxiter, degree=2):
-        import numpy as np
+        return div_time, period
 
+    def _compute_banded(self, shape, bounds, maxiter, degree, div_time, period):
+        # only the axis vectors are kept, every band builds its own c from
+        # them, so the bands are bit-identical to a single-pass render.
+        # period (or None to drop the cycle lengths) is filled like div_time
         height, width = shape
-        x_min, x_max, y_min, y_max = bounds
-        y, x = np.ogrid[y_min : y_max : height * 1j, x_min : x_max : width * 1j]
-        c = x + 1j * y
-        z = np.zeros_like(c)
-        div_time = np.full(z.shape, maxiter, dtype=int)
-
-        if self.use_mask:
-            # Only keep updating pixels that haven't diverged yet
-            mask = np.full(z.shape, True, dtype=bool)
-            for i in range(maxiter):
-                z[mask] = z[mask] ** degree + c[mask]
-                mask_now = np.abs(z) > 2
-                newly_diverged = mask_now & (div_time == maxiter)
-                div_time[newly_diverged] = i
-                mask &= ~mask_now
-                if not mask.any():
-                    break
+        x, y = grid_axes(shape, bounds)
+        budget = self.max_memory or DEFAULT_MAX_MEMORY
+        # every worker holds the buffers of one band
+        rows = max(1, budget // (width * STREAM_BYTES_PER_PIXEL * self.workers))
+        bands = [slice(y0, y0 + rows) for y0 in range(0, height, rows)]
+
+        def store(band, values):
+            div_time[band], band_period = values
+            if period is not None:
+                period[band] = band_period
+
+        if self.workers > 1 and len(bands) > 1:
+            with _worker_pool(self) as executor:
+                futures = {
+                    executor.submit(
+                        _compute_worker_tile, x, y[band], maxiter, degree
+                    ): band
+                    for band in bands
+                }
+                for future in as_completed(futures):
+                    store(futures[future], future.result())
         else:
-            for i in range(maxiter):
-                z = z * z + c
-                mask_now = np.abs(z) > 2
-                newly_diverged = mask_now & (div_time == maxiter)
-                div_time[newly_diverged] = i
-                z[mask_now] = 2  # To keep z stable
+            for band in bands:
+                store(band, _compute_tile(self, x, y[band], maxiter, degree))
 
-        return div_time
+        self.last_stats = {"bands": -(-height // rows), "band_rows": rows}
+        return div_time, period
+
+    def _compute_subdivided(self, shape, bounds, maxiter, degree):
+        height, width = shape
+        x, y = grid_axes(shape, bounds)
+        div_time = np.empty(shape, dtype=self._count_dtype(maxiter))
+        period = self._period_buffer(shape, maxiter)
+        known = np.zeros(shape, dtype=bool)
+        stats = {"iterated": 0, "filled": 0}
+
+        def evaluate(rows, cols):
+            # computes all not yet known pixels of the given index lists at once
+            flat = np.unique(rows * width + cols)
+            flat = flat[~known.reshape(-1)[flat]]
+            rows, cols = np.divmod(flat, width)
+            d, p = self._compute_points(x[cols], y[rows], maxiter, degree)
+            div_time[rows, cols] = d
+            if period is not None:
+                period[rows, cols] = p
+            known[rows, cols] = True
+            stats["iterated"] += flat.size
+
+        def border(y0, y1, x0, x1):
+            cols = np.arange(x0, x1 + 1)
+            rows = np.arange(y0 + 1, y1)
+            return (
+                np.concatenate([np.full(cols.size, y0), np.full(cols.size, y1), rows, rows]),
+                np.concatenate([cols, cols, np.full(rows.size, x0), np.full(rows.size, x1)]),
+            )
+
+        # rectangles are (y0, y1, x0, x1) with inclusive borders
+        rects = [(0, height - 1, 0, width - 1)]
+        while rects:
+            borders = [border(*rect) for rect in rects]
+            evaluate(
+                np.concatenate([rows for rows, _ in borders]),
+                np.concatenate([cols for _, cols in borders]),
+            )
+
+            next_rects = []
+            direct = []
+            for (y0, y1, x0, x1), (rows, cols) in zip(rects, borders):
+                if y1 - y0 < 2 or x1 - x0 < 2:
+                    continue  # no interior left
+
+                values = div_time[rows, cols]
+                uniform = np.all(values == values[0])
+                if uniform and period is not None:
+                    periods = period[rows, cols]
+                    uniform = np.all(periods == periods[0])
+                if uniform and values[0] != maxiter:
+                    # filling relies on the dwell bands being connected, which
+                    # fails for a rectangle that encloses the whole set (c = 0)
+                    uniform = not (x[x0] <= 0 <= x[x1] and y[y0] <= 0 <= y[y1])
+
+                if uniform:
+                    div_time[y0 + 1 : y1, x0 + 1 : x1] = values[0]
+                    if period is not None:
+                        period[y0 + 1 : y1, x0 + 1 : x1] = periods[0]
+                    known[y0 + 1 : y1, x0 + 1 : x1] = True
+                    stats["filled"] += (y1 - y0 - 1) * (x1 - x0 - 1)
+                elif min(y1 - y0, x1 - x0) <= self.min_rect_size:
+                    direct.append((y0, y1, x0, x1))
+                else:
+                    ym = (y0 + y1) // 2
+                    xm = (x0 + x1) // 2
+                    next_rects += [
+                        (y0, ym, x0, xm),
+                        (y0, ym, xm, x1),
+                        (ym, y1, x0, xm),
+                        (ym, y1, xm, x1),
+                    ]
+
+            if direct:
+                # small mixed rectangles: iterate their interiors directly
+                inner = [
+                    np.mgrid[y0 + 1 : y1, x0 + 1 : x1].reshape(2, -1)
+                    for y0, y1, x0, x1 in direct
+                ]
+                evaluate(
+                    np.concatenate([rows for rows, _ in inner]),
+                    np.concatenate([cols for _, cols in inner]),
+                )
+
+            rects = next_rects
 
-    def _compute_nocomplex(self, shape, bounds, maxiter, degree=2):
-        import numpy as np
+        self.last_stats = stats
+        return div_time, period
 
+    def _compute_cached(self, shape, alignment, maxiter, degree):
         height, width = shape
-        x_min, x_max, y_min, y_max = bounds
-        x = np.linspace(x_min, x_max, width)
-        y = np.linspace(y_min, y_max, height)
-        X, Y = np.meshgrid(x, y)
+        level, pitch, x0, y0 = alignment
+        tile_size = self.tile_size or DEFAULT_TILE_SIZE
+        engine = self._engine_name()
+        div_time = np.empty(shape, dtype=self._count_dtype(maxiter))
+
+        for ty in range(y0 // tile_size, (y0 + height - 1) // tile_size + 1):
+            for tx in range(x0 // tile_size, (x0 + width - 1) // tile_size + 1):
+                key = (level, tx, ty, tile_size, maxiter, degree, engine)
+                tile = self.tile_cache.get(key)
+                if tile is None:
+                    pixels = np.arange(tile_size)
+                    x = ROOT_MIN + (tx * tile_size + pixels) * pitch
+                    y = ROOT_MIN + (ty * tile_size + pixels) * pitch
+                    tile, _ = self._compute_points(
+                        x[np.newaxis, :], y[:, np.newaxis], maxiter, degree
+                    )
+                    self.tile_cache.put(key, tile)
+
+                # overlap of the tile with the view, in view coordinates
+                top = max(ty * tile_size, y0)
+                bottom = min((ty + 1) * tile_size, y0 + height)
+                left = max(tx * tile_size, x0)
+                right = min((tx + 1) * tile_size, x0 + width)
+                div_time[top - y0 : bottom - y0, left - x0 : right - x0] = tile[
+                    top - ty * tile_size : bottom - ty * tile_size,
+                    left - tx * tile_size : right - tx * tile_size,
+                ]
+
+        return div_time
+
+    def _engine_name(self):
+        # cache key part, cycle detection may retire escaping pixels early
+        if self.use_numba:
+            name = "numba"
+        elif self._blocked():
+            name = "blocked" if self.use_complex else "blocked-nocomplex"
+        elif self.compact or self.smooth:
+            name = "compact"
+        else:
+            name = "complex" if self.use_complex else "nocomplex"
+            name += "-inplace" if self.in_place else ""
+            name += "-mask" if self.use_mask else ""
+        if self.threshold != 2:
+            name += f"-r{self.threshold:g}"
+        name += "-smooth" if self.smooth else ""
+        return name + ("-periodic" if self.periodicity else "")
+
+    def _check_banded(self):
+        # bands have their own row split and kernel, these would be ignored
+        if not self.max_memory:
+            return
+        options = {
+            "channels": bool(self.channels),
+            "subdivide": self.subdivide,
+            "tile_size": self.tile_size is not None,
+            "tile_cache": self.tile_cache is not None,
+        }
+        used = [name for name, value in options.items() if value]
+        if used:
+            raise ValueError(f"max_memory can't be combined with {', '.join(used)}")
 
-        Zx = np.zeros_like(X)
-        Zy = np.zeros_like(Y)
-        Cx = X
-        Cy = Y
-        div_time = maxiter + np.zeros(X.shape, dtype=int)
+    def _check_resumable(self):
+        # the stored orbits belong to one plain pass over the whole view
+        options = {
+            "use_numba": self.use_numba,
+            "compact": self.compact,
+            "block_size": self.block_size,
+            "skip_interior": self.skip_interior,
+            "periodicity": self.periodicity,
+            "return_period": self.return_period,
+            "subdivide": self.subdivide,
+            "symmetry": self.symmetry,
+            "workers": self.workers > 1,
+            "tile_size": self.tile_size is not None,
+            "tile_cache": self.tile_cache is not None,
+            "max_memory": self.max_memory is not None,
+        }
+        used = [name for name, value in options.items() if value]
+        if used:
+            raise ValueError(f"resumable can't be combined with {', '.join(used)}")
+
+    def _compute_resumed(self, shape, bounds, maxiter, degree):
+        state = self.iteration_state
+        if state is None or not state.matches(shape, bounds, degree, self.threshold):
+            state = IterationState.start(shape, bounds, degree, self.threshold)
+        resumed_from = state.maxiter
+
+        state.advance(maxiter, *grid_axes(shape, bounds))
+        self.iteration_state = state
+        self.last_stats = {"resumed_from": resumed_from, "active": state.active.size}
+        return state.result(maxiter).astype(count_dtype(maxiter), copy=False)
+
+    def _periodicity_check(self, shape, maxiter):
+        if not self.periodicity:
+            return None
+        return _PeriodicityCheck(shape, self.periodicity_eps, maxiter)
+
+    def _finish(self, div_time, cycles, maxiter):
+        if cycles is None:
+            return div_time, None
+        # retired pixels stay interior even if a false positive escaped later on
+        div_time[cycles.found] = maxiter
+        return div_time, cycles.period
+
+    def _compute_complex(self, cx, cy, maxiter, degree=2):
+        return self._fused_complex(cx, cy, maxiter, degree, masked=False)
+
+    def _compute_complex_in_place(self, cx, cy, maxiter, degree=2):
+        return self._fused_complex(cx, cy, maxiter, degree, masked=self.use_mask)
+
+    def _compute_nocomplex(self, cx, cy, maxiter, degree=2):
+        return self._fused_split(cx, cy, maxiter, degree, masked=False)
+
+    def _compute_nocomplex_in_place(self, cx, cy, maxiter, degree=2):
+        return self._fused_split(cx, cy, maxiter, degree, masked=self.use_mask)
+
+    def _fused_complex(self, cx, cy, maxiter, degree, masked):
+        # all work buffers are allocated once, every ufunc writes into them
+        degree = _check_degree(degree)
+        cx, cy = np.broadcast_arrays(cx, cy)
+        c = np.empty(cx.shape, dtype=np.complex128)
+        c.real = cx
+        c.imag = cy
+        z = np.zeros_like(c)
+        power = z if degree == 2 else np.empty_like(c)  # degree 2 squares in place
+        mag2 = np.empty(c.shape)
+        work = np.empty(c.shape)
+        escaped = np.zeros(c.shape, dtype=bool)
+        active = np.ones(c.shape, dtype=bool)  # not escaped (or retired) yet
+        div_time = np.full(c.shape, maxiter, dtype=count_dtype(maxiter))
+        cycles = self._periodicity_check(c.shape, maxiter)
+        r2 = self.threshold**2
+        # masked: escaped pixels are skipped, otherwise they are clamped to 2
+        where = {"where": active} if masked else {}
+        progress = self._progress(maxiter)
+        progress.update(0, active.size)
+        live = lambda: np.count_nonzero(active)
 
         for i in range(maxiter):
-            Zx2 = Zx * Zx
-            Zy2 = Zy * Zy
-            Zxy = Zx * Zy
+            _complex_power(z, power, degree, where)
+            np.add(power, c, out=z, **where)
 
-            # Mandelbrot update rule without complex numbers
-            if degree == 2:
-                Zx_new = Zx2 - Zy2 + Cx
-                Zy_new = 2 * Zxy + Cy
-            elif degree == 3:
-                # (Zx + iZy)^3 = Zx^3 - 3ZxZy^2 + i(3Zx^2Zy - Zy^3)
-                Zx_new = Zx**3 - 3 * Zx * Zy**2 + Cx
-                Zy_new = 3 * Zx**2 * Zy - Zy**3 + Cy
-            elif degree == 4:
-                # (Zx + iZy)^4 = Zx^4 - 6Zx^2Zy^2 + Zy^4 + i(4Zx^3Zy - 4ZxZy^3)
-                Zx_new = Zx**4 - 6 * Zx**2 * Zy**2 + Zy**4 + Cx
-                Zy_new = 4 * Zx**3 * Zy - 4 * Zx * Zy**3 + Cy
-            else:
-                raise ValueError("Unsupported degree")
-            Zx = Zx_new
-            Zy = Zy_new
+            # |z|^2 > r^2 instead of |z| > r, no square root
+            np.multiply(z.real, z.real, out=mag2, **where)
+            np.multiply(z.imag, z.imag, out=work, **where)
+            np.add(mag2, work, out=mag2, **where)
+            np.greater(mag2, r2, out=escaped, **where)
+            if not masked:
+                np.copyto(z, 2, where=escaped)  # keep escaped values bounded
+            np.logical_and(escaped, active, out=escaped)
+            np.copyto(div_time, i, where=escaped)
+            np.logical_xor(active, escaped, out=active)
 
-            mag = Zx2 + Zy2
-            mask = mag > 4
-            div_now = mask & (div_time == maxiter)
-            div_time[div_now] = i
+            if cycles is not None:
+                cycles.check(i, z.real, z.imag, active)
+            if not active.any():
+                break
+            progress.update(i + 1, live)
 
-            # Avoid growing values
-            Zx[mask] = 2
-            Zy[mask] = 2
+        progress.finish(live)
+        return self._finish(div_time, cycles, maxiter)
 
-        return div_time
+    def _compute_compact(self, cx, cy, maxiter, degree=2, outputs=None):
+        # active set as 1-D arrays (pixel index, z, c), shrunk whenever the live
+        # fraction halves, so the cost follows the number of live pixels. In
+        # smooth mode escaped pixels stay in the set until they pass the
+        # bailout, which can take them a few iterations past maxiter.
+        # outputs: flat arrays of the requested OUTPUT_CHANNELS to fill
+        degree = _check_degree(degree)
+        outputs = outputs or {}
+        cx, cy = np.broadcast_arrays(cx, cy)
+        shape = cx.shape
+        idx = np.arange(cx.size)
+        c = np.empty(cx.size, dtype=np.complex128)
+        c.real = cx.reshape(-1)
+        c.imag = cy.reshape(-1)
+        z = np.zeros_like(c)
+        r2 = self.threshold**2
+        live = np.full(c.size, maxiter > 0)
+        n_live = np.count_nonzero(live)
+        div_time = np.full(c.size, maxiter, dtype=count_dtype(maxiter))
 
-    def _compute_nocomplex_in_place(self, shape, bounds, maxiter, degree=2):
-        import numpy as np
+        n_finishing = 0
+        if self.smooth:
+            bailout, log_threshold, log_degree = self._smooth_constants(degree)
+            bailout2 = bailout**2
+            counts = np.full(c.size, maxiter, dtype=count_dtype(maxiter, smooth=True))
+            finishing = np.zeros(c.size, dtype=bool)  # escaped, below the bailout
 
-        height, width = shape
-        x_min, x_max, y_min, y_max = bounds
-        x_vals = np.linspace(x_min, x_max, width)
-        y_vals = np.linspace(y_min, y_max, height)
-        X, Y = np.meshgrid(x_vals, y_vals)
-        Zx = X.copy()
-        Zy = Y.copy()
-        Cx = X
-        Cy = Y
-        div_time = np.full(Zx.shape, maxiter, dtype=int)
-
-        if self.use_mask:
-            mask = np.full(Zx.shape, True, dtype=bool)
-            for i in range(maxiter):
-                Zx2 = Zx * Zx
-                Zy2 = Zy * Zy
-                abs_squared = Zx2 + Zy2
-
-                mask_now = abs_squared > 4
-                newly_diverged = mask_now & (div_time == maxiter)
-                div_time[newly_diverged] = i
-                mask &= ~mask_now
-
-                if not mask.any():
-                    break
-
-                Zx_m = Zx[mask]
-                Zy_m = Zy[mask]
-                Cx_m = Cx[mask]
-                Cy_m = Cy[mask]
+        if self.periodicity:
+            # same Brent scheme as _PeriodicityCheck, on the compact arrays
+            eps2 = self.periodicity_eps**2
+            period = np.zeros(c.size, dtype=count_dtype(maxiter))
+            saved = np.zeros_like(c)
+            saved_at, next_save = -1, 1
 
-                if degree == 2:
-                    Zx_new = Zx_m**2 - Zy_m**2 + Cx_m
-                    Zy_new = 2 * Zx_m * Zy_m + Cy_m
-                elif degree == 3:
-                    Zx_new = Zx_m**3 - 3 * Zx_m * Zy_m**2 + Cx_m
-                    Zy_new = 3 * Zx_m**2 * Zy_m - Zy_m**3 + Cy_m
-                elif degree == 4:
-                    Zx_new = Zx_m**4 - 6 * Zx_m**2 * Zy_m**2 + Zy_m**4 + Cx_m
-                    Zy_new = 4 * Zx_m**3 * Zy_m - 4 * Zx_m * Zy_m**3 + Cy_m
-                else:
-                    raise ValueError("Unsupported degree")
+        # only the requested channels are tracked
+        dz = np.zeros_like(c) if "dzdc" in outputs else None
+        trap = np.full(c.size, np.inf) if "trap" in outputs else None
+
+        def record(selected):
+            # channel values of the selected (compact) entries
+            pixels = idx[selected]
+            for name, values in (("abs2", mag2), ("z", z), ("dzdc", dz)):
+                if name in outputs:
+                    outputs[name][pixels] = values[selected]
+            if trap is not None:
+                outputs["trap"][pixels] = np.sqrt(trap[selected])
+
+        progress = self._progress(maxiter)
+        progress.update(0, c.size)
+        for i in itertools.count():
+            if not n_live + n_finishing:
+                break
+            if dz is not None:
+                # dz/dc of z^d + c: d z^(d-1) dz/dc + 1, before z moves on,
+                # it may overflow near the boundary (distance estimate 0)
+                with np.errstate(over="ignore", invalid="ignore"):
+                    if degree == 2:
+                        dz *= 2 * z
+                    elif degree > 1:
+                        derivative = np.empty_like(z)
+                        _complex_power(z, derivative, degree - 1, {})
+                        dz *= degree * derivative
+                    dz += 1
+            power = z if degree == 2 else np.empty_like(z)
+            _complex_power(z, power, degree, {})
+            np.add(power, c, out=z)
 
-                Zx[mask] = Zx_new
-                Zy[mask] = Zy_new
+            mag2 = z.real * z.real
+            mag2 += z.imag * z.imag
+            if trap is not None:
+                np.minimum(trap, mag2, out=trap)
+            escaped = mag2 > r2
+            clamp = mag2 > bailout2 if self.smooth else escaped.copy()
+            escaped &= live
+            if escaped.any():
+                # scatter only at escape
+                if outputs:
+                    record(escaped)
+                div_time[idx[escaped]] = i
+                live ^= escaped
+                n_escaped = np.count_nonzero(escaped)
+                n_live -= n_escaped
+                if self.smooth:
+                    finishing |= escaped
+                    n_finishing += n_escaped
 
+            # dead entries must stay bounded
+            np.copyto(z, 2, where=clamp)
+            if dz is not None:
+                np.copyto(dz, 1, where=clamp)
+
+            if self.smooth:
+                done = clamp & finishing
+                if done.any():
+                    # continuous count, normalised to the escape radius
+                    ratio = 0.5 * np.log(mag2[done]) / log_threshold
+                    mu = i + 1 - np.log(ratio) / log_degree
+                    counts[idx[done]] = np.maximum(mu, 0.0)
+                    finishing ^= done
+                    n_finishing -= np.count_nonzero(done)
+
+            if self.periodicity:
+                diff = z - saved
+                hit = live & (diff.real * diff.real + diff.imag * diff.imag < eps2)
+                if hit.any():
+                    if outputs:
+                        record(hit)
+                    period[idx[hit]] = i - saved_at
+                    live ^= hit
+                    n_live -= np.count_nonzero(hit)
+                if i == next_save:
+                    saved[:] = z
+                    saved_at, next_save = i, next_save * 2
+
+            if i == maxiter - 1:
+                if outputs and n_live:
+                    record(live)
+                live[:] = False  # not escaped by now: interior
+                n_live = 0
+            if 2 * (n_live + n_finishing) <= idx.size:
+                keep = live | finishing if self.smooth else live
+                idx, z, c, live = idx[keep], z[keep], c[keep], live[keep]
+                if self.smooth:
+                    finishing = finishing[keep]
+                if self.periodicity:
+                    saved = saved[keep]
+                if dz is not None:
+                    dz = dz[keep]
+                if trap is not None:
+                    trap = trap[keep]
+            # smooth orbits finishing past maxiter stay at 100%
+            progress.update(min(i + 1, maxiter), n_live + n_finishing)
+
+        progress.finish(lambda: np.count_nonzero(div_time == maxiter))
+        result = counts if self.smooth else div_time
+        if not self.periodicity:
+            return result.reshape(shape), None
+        return result.reshape(shape), period.reshape(shape)
+
+    def _smooth_constants(self, degree):
+        # orbits beyond a radius >= 2 keep growing, so the bailout is reached
+        if self.threshold < 2 or degree <= 1:
+            raise ValueError("Smooth counts need a threshold >= 2 and a degree > 1")
+        bailout = max(SMOOTH_BAILOUT, self.threshold)
+        return bailout, np.log(self.threshold), np.log(degree)
+
+    def _compute_blocked(self, cx, cy, maxiter, degree=2):
+        # the live set (compact 1-D arrays) runs K iterations of bare
+        # arithmetic, then one escape test. Escaped orbits keep growing, so
+        # a pixel that escaped inside the block is still outside at its end,
+        # those few are re-run from the block start with per-step checks.
+        degree = _check_degree(degree)
+        cx, cy = np.broadcast_arrays(cx, cy)
+        shape = cx.shape
+        idx = np.arange(cx.size)
+        div_time = np.full(cx.size, maxiter, dtype=count_dtype(maxiter))
+        if self.use_complex:
+            c = np.empty(cx.size, dtype=np.complex128)
+            c.real = cx.reshape(-1)
+            c.imag = cy.reshape(-1)
+            state, c = [np.zeros_like(c)], [c]
         else:
-            for i in range(maxiter):
+            c = [np.array(a, dtype=float).reshape(-1) for a in (cx, cy)]
+            state = [np.zeros(cx.size) for _ in range(4)]  # zr, zi, zr^2, zi^2
+        step, mag2 = self._blocked_arithmetic(degree)
+        r2 = self.threshold**2
+
+        auto = self.block_size == "auto"
+        block = DEFAULT_BLOCK_SIZE if auto else int(self.block_size)
+        i = 0
+        progress = self._progress(maxiter)
+        progress.update(0, idx.size)
+        # overflow of escaped orbits (inf, nan) is expected, the escape test
+        # counts anything that is not <= r^2 as escaped
+        with np.errstate(over="ignore", invalid="ignore"):
+            while i < maxiter and idx.size:
+                steps = min(block, maxiter - i)
+                start = [a.copy() for a in state]
+                for _ in range(steps):
+                    step(state, c)
+
+                escaped = ~(mag2(state) <= r2)
+                n_escaped = np.count_nonzero(escaped)
+                if n_escaped:
+                    rerun = [a[escaped] for a in start]
+                    rerun_c = [a[escaped] for a in c]
+                    first = np.full(n_escaped, steps)
+                    for s in range(steps):
+                        step(rerun, rerun_c)
+                        first[(mag2(rerun) > r2) & (first == steps)] = s
+                    div_time[idx[escaped]] = i + first
+
+                    keep = ~escaped
+                    idx = idx[keep]
+                    state = [a[keep] for a in state]
+                    c = [a[keep] for a in c]
+
+                if auto:
+                    # few escapes: longer blocks, many: shorter re-runs
+                    fraction = n_escaped / (idx.size + n_escaped)
+                    if fraction > 0.2:
+                        block = max(block // 2, 2)
+                    elif fraction < 0.05:
+                        block = min(block * 2, MAX_BLOCK_SIZE)
+                i += steps
+                progress.update(i, idx.size)
+
+        progress.finish(idx.size)
+        return div_time.reshape(shape), None
+
+    def _blocked_arithmetic(self, degree):
+        # one iteration on the state lists of _compute_blocked, same operations
+        # as the fused kernels so the escape times are identical
+        if self.use_complex:
+
+            def step(state, c):
+                (z,), (c,) = state, c
+                power = z if degree == 2 else np.empty_like(z)
+                _complex_power(z, power, degree, {})
+                np.add(power, c, out=z)
+
+            def mag2(state):
+                (z,) = state
+                return z.real * z.real + z.imag * z.imag
+
+        else:
+
+            def step(state, c):
+                zr, zi, sr, si = state
+                cx, cy = c
                 if degree == 2:
-                    Zx_new = Zx**2 - Zy**2 + Cx
-                    Zy_new = 2 * Zx * Zy + Cy
-                elif degree == 3:
-                    Zx_new = Zx**3 - 3 * Zx * Zy**2 + Cx
-                    Zy_new = 3 * Zx**2 * Zy - Zy**3 + Cy
-                elif degree == 4:
-                    Zx_new = Zx**4 - 6 * Zx**2 * Zy**2 + Zy**4 + Cx
-                    Zy_new = 4 * Zx**3 * Zy - 4 * Zx * Zy**3 + Cy
+                    pi = zr * zi
+                    np.add(pi, pi, out=pi)
+                    np.add(pi, cy, out=zi)
+                    np.subtract(sr, si, out=zr)
+                    np.add(zr, cx, out=zr)
                 else:
-                    raise ValueError("Unsupported degree")
-                abs_squared = Zx2 + Zy2
-                mask_now = abs_squared > 4
-                newly_diverged = mask_now & (div_time == maxiter)
-                div_time[newly_diverged] = i
+                    pr, pi = np.empty_like(zr), np.empty_like(zr)
+                    if isinstance(degree, float):
+                        _split_polar_power(zr, zi, sr, si, pr, pi, degree, {})
+                    else:
+                        _split_power(zr, zi, pr, pi, sr, si, degree, {})
+                    np.add(pr, cx, out=zr)
+                    np.add(pi, cy, out=zi)
+                np.multiply(zr, zr, out=sr)
+                np.multiply(zi, zi, out=si)
 
-                Zx_new = Zx * Zx - Zy * Zy + Cx
-                Zy_new = 2 * Zx * Zy + Cy
+            def mag2(state):
+                return state[2] + state[3]
 
-                Zx[~mask_now] = Zx_new[~mask_now]
-                Zy[~mask_now] = Zy_new[~mask_now]
+        return step, mag2
 
-        return div_time
+    def _fused_split(self, cx, cy, maxiter, degree, masked):
+        # real/imaginary planes instead of complex numbers, same buffering
+        degree = _check_degree(degree)
+        cx, cy = np.broadcast_arrays(cx, cy)
+        shape = cx.shape
+        zr, zi = np.zeros(shape), np.zeros(shape)
+        pr, pi = np.empty(shape), np.empty(shape)
+        sr, si = np.zeros(shape), np.zeros(shape)  # zr^2, zi^2 of the last step
+        mag2 = pr  # free again once z is updated
+        escaped = np.zeros(shape, dtype=bool)
+        active = np.ones(shape, dtype=bool)
+        div_time = np.full(shape, maxiter, dtype=count_dtype(maxiter))
+        cycles = self._periodicity_check(shape, maxiter)
+        r2 = self.threshold**2
+        where = {"where": active} if masked else {}
+        progress = self._progress(maxiter)
+        progress.update(0, active.size)
+        live = lambda: np.count_nonzero(active)
+
+        for i in range(maxiter):
+            if degree == 2:
+                # reuses the squares of the escape test
+                np.multiply(zr, zi, out=pi, **where)
+                np.add(pi, pi, out=pi, **where)
+                np.add(pi, cy, out=zi, **where)
+                np.subtract(sr, si, out=pr, **where)
+                np.add(pr, cx, out=zr, **where)
+            elif isinstance(degree, float):
+                # |z|^2 is already known from the escape test
+                _split_polar_power(zr, zi, sr, si, pr, pi, degree, where)
+                np.add(pr, cx, out=zr, **where)
+                np.add(pi, cy, out=zi, **where)
+            else:
+                _split_power(zr, zi, pr, pi, sr, si, degree, where)
+                np.add(pr, cx, out=zr, **where)
+                np.add(pi, cy, out=zi, **where)
+
+            np.multiply(zr, zr, out=sr, **where)
+            np.multiply(zi, zi, out=si, **where)
+            np.add(sr, si, out=mag2, **where)
+            np.greater(mag2, r2, out=escaped, **where)
+            if not masked:
+                for plane, value in ((zr, 2.0), (zi, 2.0), (sr, 4.0), (si, 4.0)):
+                    np.copyto(plane, value, where=escaped)
+            np.logical_and(escaped, active, out=escaped)
+            np.copyto(div_time, i, where=escaped)
+            np.logical_xor(active, escaped, out=active)
+
+            if cycles is not None:
+                cycles.check(i, zr, zi, active)
+            if not active.any():
+                break
+            progress.update(i + 1, live)
+
+        progress.finish(live)
+        return self._finish(div_time, cycles, maxiter)
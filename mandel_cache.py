@@ -0,0 +1,160 @@
+import math
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+# level 0 covers [-2, 2] x [-2, 2] with one tile, every level halves the pixel pitch
+ROOT_MIN = -2.0
+ROOT_SIZE = 4.0
+DEFAULT_MEMORY_BYTES = 256 * 2**20
+DEFAULT_DISK_BYTES = 2**30
+
+
+def quadtree_alignment(shape, bounds, tile_size):
+    """Returns (level, pitch, x0, y0) if the view lies on the pixel grid of a
+    quadtree level, x0/y0 being global pixel indices of its first column/row.
+    Returns None for views that are not aligned.
+    """
+    height, width = shape
+    if height < 2 or width < 2:
+        return None
+    x_min, x_max, y_min, y_max = (float(b) for b in bounds)
+    pitch = (x_max - x_min) / (width - 1)
+    pitch_y = (y_max - y_min) / (height - 1)
+    if pitch <= 0 or not math.isclose(pitch, pitch_y, rel_tol=1e-9):
+        return None
+
+    level = math.log2(ROOT_SIZE / (pitch * tile_size))
+    if level < 0 or abs(level - round(level)) > 1e-9:
+        return None
+    level = round(level)
+    pitch = ROOT_SIZE / (2**level * tile_size)
+
+    offsets = []
+    for start in (x_min, y_min):
+        k = (start - ROOT_MIN) / pitch
+        if abs(k - round(k)) > 1e-6:
+            return None
+        offsets.append(round(k))
+    return level, pitch, offsets[0], offsets[1]
+
+
+def grid_shift(old_shape, old_bounds, new_shape, new_bounds):
+    """Returns the (row, column) index of the new view's first pixel on the pixel
+    grid of the old view, or None if the two grids do not share pixels.
+
+    Only exact integer offsets count: the shared pixels must have bit-identical
+    coordinates (as grid_axes computes them), e.g. pans on a dyadic pitch.
+    """
+    shift = []
+    for axis, (old_n, new_n) in enumerate(zip(old_shape, new_shape)):
+        # bounds are x first, shapes are (height, width)
+        lo, hi = (2, 3) if axis == 0 else (0, 1)
+        if old_n < 2 or new_n < 2:
+            return None
+        old_min, old_max = float(old_bounds[lo]), float(old_bounds[hi])
+        new_min, new_max = float(new_bounds[lo]), float(new_bounds[hi])
+        pitch = (old_max - old_min) / (old_n - 1)
+        if pitch <= 0 or pitch != (new_max - new_min) / (new_n - 1):
+            return None
+        k = round((new_min - old_min) / pitch)
+        first, last = max(0, -k), min(new_n, old_n - k)
+        if first >= last:
+            return None
+        old_axis = np.linspace(old_min, old_max, old_n)[first + k : last + k]
+        new_axis = np.linspace(new_min, new_max, new_n)[first:last]
+        if not np.array_equal(old_axis, new_axis):
+            return None
+        shift.append(k)
+    return tuple(shift)
+
+
+class TileCache:
+    """LRU of rendered tiles with a byte budget, optionally backed by .npy files.
+
+    Keys are tuples of (level, tx, ty, tile_size, maxiter, degree, engine).
+    Tiles evicted from memory stay available on disk if a directory is given,
+    the disk store drops its least recently used files beyond max_disk_bytes.
+    """
+
+    def __init__(
+        self,
+        max_bytes=DEFAULT_MEMORY_BYTES,
+        directory=None,
+        max_disk_bytes=DEFAULT_DISK_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "disk_hits": 0,
+            "disk_evictions": 0,
+        }
+        self._tiles = OrderedDict()
+        self._bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            self.stats["hits"] += 1
+            return tile
+
+        path = self._path(key)
+        if path and os.path.exists(path):
+            tile = np.load(path)
+            os.utime(path)  # mtime is the LRU order of the disk store
+            self.stats["disk_hits"] += 1
+            self._remember(key, tile)
+            return tile
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key, tile) -> None:
+        self._remember(key, tile)
+        path = self._path(key)
+        if path:
+            np.save(path, tile)
+            self._evict_disk()
+
+    def clear(self) -> None:
+        self._tiles.clear()
+        self._bytes = 0
+
+    def _remember(self, key, tile):
+        if key in self._tiles:
+            self._bytes -= self._tiles.pop(key).nbytes
+        self._tiles[key] = tile
+        self._bytes += tile.nbytes
+        while self._bytes > self.max_bytes and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.stats["evictions"] += 1
+
+    def _path(self, key):
+        if not self.directory:
+            return None
+        level, tx, ty, tile_size, maxiter, degree, engine = key
+        name = f"L{level}_x{tx}_y{ty}_t{tile_size}_i{maxiter}_d{degree}_{engine}.npy"
+        return os.path.join(self.directory, name)
+
+    def _evict_disk(self):
+        files = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".npy")
+        ]
+        total = sum(os.path.getsize(f) for f in files)
+        for path in sorted(files, key=os.path.getmtime):
+            if total <= self.max_disk_bytes:
+                break
+            total -= os.path.getsize(path)
+            os.remove(path)
+            self.stats["disk_evictions"] += 1
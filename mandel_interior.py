@@ -0,0 +1,45 @@
+import numpy as np
+
+# Low-period hyperbolic components of the degree-2 Mandelbrot set, as
+# (nucleus real, nucleus imag, radius, period). Each radius is ~95% of the
+# largest disk around the nucleus on which the attracting cycle still has a
+# multiplier below 1, so every disk lies strictly inside the set.
+# Components off the real axis are listed once and mirrored in interior_mask.
+BULBS = [
+    (-0.122561166876654, 0.744861766619744, 0.0875, 3),
+    (-1.754877666246693, 0.0, 0.0048, 3),
+    (0.282271390766914, 0.530060617578525, 0.0403, 4),
+    (-1.310702641336833, 0.0, 0.0545, 4),
+    (0.379513588015924, 0.334932305597498, 0.0216, 5),
+    (-0.504340175446244, 0.562765761452982, 0.0365, 5),
+    (-1.138000666650965, 0.240332401262098, 0.0243, 6),
+]
+
+
+def interior_periods(cx, cy):
+    """Returns the attracting-cycle period of interior points, 0 where unknown"""
+    cx, cy = np.broadcast_arrays(cx, cy)
+    cy2 = cy * cy
+    period = np.zeros(cx.shape, dtype=np.uint8)
+
+    # main cardioid: q * (q + (x - 1/4)) <= y^2 / 4
+    xq = cx - 0.25
+    q = xq * xq + cy2
+    period[q * (q + xq) <= 0.25 * cy2] = 1
+
+    # period-2 bulb: |c + 1| <= 1/4
+    xb = cx + 1.0
+    period[xb * xb + cy2 <= 0.0625] = 2
+
+    abs_cy = np.abs(cy)
+    for re, im, radius, bulb_period in BULBS:
+        dx = cx - re
+        dy = abs_cy - im
+        period[dx * dx + dy * dy <= radius * radius] = bulb_period
+
+    return period
+
+
+def interior_mask(cx, cy):
+    """Marks points that lie in the main cardioid, the period-2 bulb or a BULBS disk"""
+    return interior_periods(cx, cy) > 0
@@ -0,0 +1,157 @@
+import json
+import os
+import time
+from concurrent.futures import as_completed
+
+import numpy as np
+
+from mandel_all import (
+    DEFAULT_TILE_SIZE,
+    _compute_tile,
+    _compute_worker_tile,
+    _worker_pool,
+    grid_axes,
+)
+from mandel_perturbation import needs_deep_zoom
+
+# the manifest is rewritten at most this often (seconds), tiles finished in
+# between are recomputed after a crash
+CHECKPOINT_INTERVAL = 1.0
+
+
+class RenderJob:
+    """Restartable tiled render into a .npy file.
+
+    Every finished tile is written into a memory-mapped .npy, a JSON manifest
+    next to it (<name>.json) records the finished tiles. Running the same job
+    again skips those, a job with different parameters starts over.
+    """
+
+    def __init__(self, path, shape, bounds, maxiter, degree=2, tile_size=None):
+        self.path = str(path)
+        self.manifest_path = os.path.splitext(self.path)[0] + ".json"
+        self.shape = tuple(shape)
+        self.bounds = tuple(str(b) for b in bounds)  # str keeps Decimal digits
+        self.maxiter = maxiter
+        self.degree = degree
+        self.tile_size = tile_size or DEFAULT_TILE_SIZE
+        self.stats = {}
+
+    def tiles(self):
+        """(ty, tx) index of every tile, row by row"""
+        height, width = self.shape
+        return [
+            (ty, tx)
+            for ty in range(-(-height // self.tile_size))
+            for tx in range(-(-width // self.tile_size))
+        ]
+
+    def run(self, calculator, verbose=True) -> np.ndarray:
+        """Renders the missing tiles with calculator, returns the .npy memmap.
+
+        calculator.workers > 1 spreads the tiles over a process pool.
+        """
+        if calculator.deep_zoom or needs_deep_zoom(self.shape, self.bounds):
+            raise ValueError("Render jobs need float64 coordinates, not a deep zoom")
+        if calculator.max_memory:
+            raise ValueError("Render jobs are tiled, max_memory can't be combined")
+
+        header = self._header(calculator)
+        done = self._load_done(header)
+        if done is None:
+            done = set()
+            div_time = np.lib.format.open_memmap(
+                self.path,
+                mode="w+",
+                dtype=calculator._count_dtype(self.maxiter),
+                shape=self.shape,
+            )
+        else:
+            div_time = np.lib.format.open_memmap(self.path, mode="r+")
+
+        x, y = grid_axes(self.shape, self.bounds)
+        size = self.tile_size
+        total = len(self.tiles())
+        todo = [tile for tile in self.tiles() if tile not in done]
+
+        def tile_args(ty, tx):
+            return (
+                x[tx * size : (tx + 1) * size],
+                y[ty * size : (ty + 1) * size],
+                self.maxiter,
+                self.degree,
+            )
+
+        start = last_checkpoint = time.perf_counter()
+        computed = 0
+
+        def finish(tile, values):
+            nonlocal computed, last_checkpoint
+            ty, tx = tile
+            rows = slice(ty * size, ty * size + values.shape[0])
+            cols = slice(tx * size, tx * size + values.shape[1])
+            div_time[rows, cols] = values
+            done.add(tile)
+            computed += 1
+            now = time.perf_counter()
+            if now - last_checkpoint >= CHECKPOINT_INTERVAL or len(done) == total:
+                # the tiles have to be on disk before the manifest lists them
+                div_time.flush()
+                self._save_done(header, done)
+                last_checkpoint = now
+                if verbose:
+                    rate = computed / (now - start)
+                    print(f"Tiles {len(done)}/{total} done, {rate:.2f} tiles/s")
+
+        if calculator.workers > 1 and len(todo) > 1:
+            with _worker_pool(calculator) as executor:
+                futures = {
+                    executor.submit(_compute_worker_tile, *tile_args(*tile)): tile
+                    for tile in todo
+                }
+                for future in as_completed(futures):
+                    finish(futures[future], future.result()[0])
+        else:
+            for tile in todo:
+                finish(tile, _compute_tile(calculator, *tile_args(*tile))[0])
+
+        elapsed = time.perf_counter() - start
+        div_time.flush()
+        self._save_done(header, done)
+        self.stats = {
+            "tiles": total,
+            "skipped": total - len(todo),
+            "computed": computed,
+            "seconds": elapsed,
+            "tiles_per_s": computed / elapsed if elapsed > 0 else 0.0,
+        }
+        return div_time
+
+    def _header(self, calculator):
+        # everything that changes the values of the file
+        return {
+            "shape": list(self.shape),
+            "bounds": list(self.bounds),
+            "maxiter": self.maxiter,
+            "degree": self.degree,
+            "tile_size": self.tile_size,
+            "engine": calculator._engine_name(),
+            "dtype": np.dtype(calculator._count_dtype(self.maxiter)).str,
+        }
+
+    def _load_done(self, header):
+        # finished tiles of a matching earlier run, None to start over
+        if not (os.path.exists(self.manifest_path) and os.path.exists(self.path)):
+            return None
+        with open(self.manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get("header") != header:
+            return None
+        return {tuple(tile) for tile in manifest["done"]}
+
+    def _save_done(self, header, done):
+        # write and rename, a crash never leaves a half-written manifest
+        temp = self.manifest_path + ".tmp"
+        with open(temp, "w") as f:
+            json.dump({"header": header, "done": sorted(done)}, f)
+        os.replace(temp, self.manifest_path)
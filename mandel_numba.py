@@ -0,0 +1,134 @@
+import numpy as np
+from numba import njit, prange
+
+
+@njit(inline="always")
+def _step(zr, zi, cr, ci, degree, int_degree, polar, top_bit):
+    # one iteration z^degree + c on a single pixel
+    if degree == 2:
+        return zr * zr - zi * zi + cr, 2.0 * zr * zi + ci
+    elif degree == 3:
+        zr2 = zr * zr
+        zi2 = zi * zi
+        return zr * (zr2 - 3.0 * zi2) + cr, zi * (3.0 * zr2 - zi2) + ci
+    elif degree == 4:
+        zr2 = zr * zr
+        zi2 = zi * zi
+        return (
+            zr2 * zr2 - 6.0 * zr2 * zi2 + zi2 * zi2 + cr,
+            4.0 * zr * zi * (zr2 - zi2) + ci,
+        )
+    elif polar:
+        # real degree: |z|^d * e^(i d arg z)
+        r = (zr * zr + zi * zi) ** (0.5 * degree)
+        angle = np.arctan2(zi, zr) * degree
+        return r * np.cos(angle) + cr, r * np.sin(angle) + ci
+    # arbitrary integer degree: binary addition chain
+    pr = zr
+    pi = zi
+    bit = top_bit // 2
+    while bit:
+        pr, pi = pr * pr - pi * pi, 2.0 * pr * pi
+        if int_degree & bit:
+            pr, pi = pr * zr - pi * zi, pr * zi + pi * zr
+        bit //= 2
+    return pr + cr, pi + ci
+
+
+@njit(parallel=True, cache=True)
+def _escape_time(cx, cy, maxiter, degree, block, eps2, r2, bailout2, log_threshold):
+    # cx/cy are flat; every block (one image row for 2D views) is one prange task
+    n = cx.shape[0]
+    int_degree = int(degree)
+    polar = int_degree != degree
+    # highest bit of the exponent, the addition chain walks the ones below
+    top_bit = 1
+    while top_bit * 2 <= int_degree:
+        top_bit *= 2
+    div_time = np.full(n, maxiter, dtype=np.int64)
+    period = np.zeros(n, dtype=np.int64)
+    smooth = np.full(n, float(maxiter))
+    blocks = (n + block - 1) // block
+
+    for b in prange(blocks):
+        for k in range(b * block, min(n, (b + 1) * block)):
+            cr = cx[k]
+            ci = cy[k]
+            zr = 0.0
+            zi = 0.0
+            # Brent cycle detection: compare against z saved at 1, 2, 4, 8, ...
+            saved_r = 0.0
+            saved_i = 0.0
+            saved_at = -1
+            next_save = 1
+            for i in range(maxiter):
+                zr, zi = _step(zr, zi, cr, ci, degree, int_degree, polar, top_bit)
+
+                # true early exit: the pixel stops costing anything once it escaped
+                if zr * zr + zi * zi > r2:
+                    div_time[k] = i
+                    if bailout2 > 0.0:
+                        # continuous count: iterate on up to the large bailout
+                        j = i
+                        while zr * zr + zi * zi <= bailout2:
+                            zr, zi = _step(
+                                zr, zi, cr, ci, degree, int_degree, polar, top_bit
+                            )
+                            j += 1
+                        ratio = 0.5 * np.log(zr * zr + zi * zi) / log_threshold
+                        smooth[k] = max(j + 1 - np.log(ratio) / np.log(degree), 0.0)
+                    break
+
+                if eps2 > 0.0:
+                    dr = zr - saved_r
+                    di = zi - saved_i
+                    if dr * dr + di * di < eps2:
+                        period[k] = i - saved_at
+                        break
+                    if i == next_save:
+                        saved_r = zr
+                        saved_i = zi
+                        saved_at = i
+                        next_save *= 2
+
+    return div_time, period, smooth
+
+
+def compute_numba(
+    cx,
+    cy,
+    maxiter,
+    degree=2,
+    periodicity_eps=0.0,
+    return_period=False,
+    threshold=2.0,
+    bailout=0.0,
+):
+    """Escape times for broadcastable c = cx + i*cy via a compiled per-pixel loop.
+
+    A periodicity_eps > 0 enables cycle detection, return_period=True returns
+    (div_time, period) with period 0 where no cycle was detected. A bailout
+    above threshold returns continuous (smooth) counts instead of div_time.
+    """
+    if not degree >= 1:
+        raise ValueError("Unsupported degree")
+
+    cx, cy = np.broadcast_arrays(np.asarray(cx, dtype=np.float64), cy)
+    shape = cx.shape
+    block = shape[-1] if len(shape) > 1 else 1024
+
+    div_time, period, smooth = _escape_time(
+        np.ascontiguousarray(cx).ravel(),
+        np.ascontiguousarray(cy, dtype=np.float64).ravel(),
+        int(maxiter),
+        float(degree),
+        max(1, block),
+        float(periodicity_eps) ** 2,
+        float(threshold) ** 2,
+        float(bailout) ** 2,
+        float(np.log(threshold)),
+    )
+    counts = smooth if bailout > 0 else div_time
+    if return_period:
+        return counts.reshape(shape), period.reshape(shape)
+    return counts.reshape(shape)
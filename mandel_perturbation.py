@@ -0,0 +1,213 @@
+import functools
+import math
+from decimal import Decimal, localcontext
+
+import numpy as np
+
+DEEP_ZOOM_PRECISION = 60  # minimum number of decimal digits for view coordinates
+GLITCH_TOLERANCE = 1e-3  # Pauldelbrot criterion: |Z + d| < tol * |Z|
+SERIES_TOLERANCE = 1e-9  # cubic term vs. linear term of the series approximation
+MAX_REFERENCES = 16
+# float64 grids degrade once the pixel spacing drops below this (relative) size
+DEEP_ZOOM_THRESHOLD = 1e-12
+
+
+def to_decimal(value) -> Decimal:
+    """Converts str/int/float/Decimal coordinates without losing the digits of strings"""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value))  # shortest repr, not the binary expansion
+    return Decimal(value)
+
+
+def decimal_precision(func):
+    """Runs func with at least DEEP_ZOOM_PRECISION decimal digits"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with localcontext() as ctx:
+            ctx.prec = max(ctx.prec, DEEP_ZOOM_PRECISION)
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def needs_deep_zoom(shape, bounds) -> bool:
+    """True if the pixel spacing of the view is too small for float64 coordinates"""
+    x_min, x_max, y_min, y_max = (to_decimal(b) for b in bounds)
+    height, width = shape
+    # an axis with a single pixel has no spacing (strips, single rows)
+    spacings = [
+        abs(high - low) / (pixels - 1)
+        for low, high, pixels in ((x_min, x_max, width), (y_min, y_max, height))
+        if pixels > 1
+    ]
+    if not spacings:
+        return False
+    scale = max(abs(x_min), abs(x_max), abs(y_min), abs(y_max), Decimal(1))
+    return min(spacings) < Decimal(DEEP_ZOOM_THRESHOLD) * scale
+
+
+def reference_orbit(
+    c_re: Decimal, c_im: Decimal, maxiter: int, degree=2, threshold=2.0
+) -> np.ndarray:
+    """Orbit Z_0 .. Z_n of c in decimal arithmetic, rounded to complex128.
+
+    The orbit stops early (n < maxiter) once the reference itself escapes.
+    """
+    r2 = to_decimal(threshold) ** 2
+    orbit = np.zeros(maxiter + 1, dtype=np.complex128)
+    zr = Decimal(0)
+    zi = Decimal(0)
+    for n in range(maxiter):
+        if degree == 2:
+            zr, zi = zr * zr - zi * zi + c_re, 2 * zr * zi + c_im
+        else:
+            pr, pi = zr, zi
+            for _ in range(degree - 1):
+                pr, pi = pr * zr - pi * zi, pr * zi + pi * zr
+            zr, zi = pr + c_re, pi + c_im
+
+        orbit[n + 1] = complex(float(zr), float(zi))
+        if zr * zr + zi * zi > r2:
+            return orbit[: n + 2]
+
+    return orbit
+
+
+def _series_approximation(orbit, dc, r2):
+    # d_n ~ A_n dc + B_n dc^2 + C_n dc^3 along the reference orbit (degree 2)
+    delta_max = np.abs(dc).max()
+    a = b = c = 0j
+    coefficients = [(0, a, b, c)]
+    for n in range(orbit.size - 1):
+        z = orbit[n]
+        a, b, c = 2 * z * a + 1, 2 * z * b + a * a, 2 * z * c + 2 * a * b
+        if not (
+            np.isfinite(abs(c))
+            and abs(c) * delta_max**2 <= SERIES_TOLERANCE * abs(a)
+        ):
+            break
+        coefficients.append((n + 1, a, b, c))
+
+    # the skipped iterations must not hide an escape, back off if they do
+    while True:
+        n, a, b, c = coefficients[-1]
+        delta = ((c * dc + b) * dc + a) * dc
+        z = orbit[n] + delta
+        if n == 0 or not np.any(z.real**2 + z.imag**2 > r2):
+            return n, delta
+        coefficients = coefficients[: max(1, len(coefficients) // 2)]
+
+
+def _iterate_deltas(orbit, dc, maxiter, degree, use_series, r2):
+    # perturbed iteration of every pixel against one reference orbit, returns
+    # the escape times and the pixels that glitched (plus their |z| there)
+    n_ref = orbit.size - 1
+    div_time = np.full(dc.size, maxiter, dtype=int)
+    glitch_abs = np.full(dc.size, np.inf)
+    glitched = np.zeros(dc.size, dtype=bool)
+
+    start = 0
+    delta = np.zeros_like(dc)
+    if use_series and degree == 2:
+        start, delta = _series_approximation(orbit, dc, r2)
+
+    # (Z + d)^k - Z^k = d * (a_1 + d * (a_2 + ... + d * a_k)), a_j = C(k, j) Z^(k-j)
+    binomials = [math.comb(degree, j) for j in range(degree + 1)]
+
+    live = np.arange(dc.size)
+    c = dc
+    for n in range(start, min(maxiter, n_ref)):
+        Z = orbit[n]
+        if degree == 2:
+            delta = (2 * Z + delta) * delta + c
+        else:
+            poly = binomials[degree] * np.ones_like(delta)
+            for j in range(degree - 1, 0, -1):
+                poly = poly * delta + binomials[j] * Z ** (degree - j)
+            delta = poly * delta + c
+
+        z = orbit[n + 1] + delta
+        mag2 = z.real * z.real + z.imag * z.imag
+        escaped = mag2 > r2
+        glitch = ~escaped & (
+            mag2 < GLITCH_TOLERANCE**2 * (orbit[n + 1] * orbit[n + 1].conjugate()).real
+        )
+
+        div_time[live[escaped]] = n
+        if glitch.any():
+            glitched[live[glitch]] = True
+            glitch_abs[live[glitch]] = np.sqrt(mag2[glitch])
+
+        keep = ~(escaped | glitch)
+        if not keep.all():
+            live, delta, c = live[keep], delta[keep], c[keep]
+        if live.size == 0:
+            break
+
+    if n_ref < maxiter:
+        # the reference escaped early, survivors need a different one
+        glitched[live] = True
+
+    return div_time, np.flatnonzero(glitched), glitch_abs
+
+
+def compute_perturbation(shape, bounds, maxiter, degree=2, threshold=2.0) -> np.ndarray:
+    """Escape times of a (deep) view via perturbation theory.
+
+    A high-precision reference orbit is computed at the view centre and every
+    pixel iterates its float64 offset against it. Glitched pixels are
+    re-iterated against a new reference taken from the glitched pixels.
+    bounds are (x_min, x_max, y_min, y_max) as strings, Decimals or floats,
+    threshold is the escape radius.
+    """
+    if int(degree) != degree or degree < 2:
+        raise ValueError("Unsupported degree")
+    degree = int(degree)
+
+    height, width = shape
+    x_min, x_max, y_min, y_max = (to_decimal(b) for b in bounds)
+
+    with localcontext() as ctx:
+        spacing = max(abs(x_max - x_min), abs(y_max - y_min)) / max(height, width, 2)
+        digits = -spacing.adjusted() if spacing else 0
+        ctx.prec = max(DEEP_ZOOM_PRECISION, digits + 20)
+
+        center_re = (x_min + x_max) / 2
+        center_im = (y_min + y_max) / 2
+        step_x = (x_max - x_min) / max(width - 1, 1)
+        step_y = (y_max - y_min) / max(height - 1, 1)
+
+        # pixel offsets from the centre are small, but fine for float64
+        delta_x = float(x_min - center_re) + np.arange(width) * float(step_x)
+        delta_y = float(y_min - center_im) + np.arange(height) * float(step_y)
+        dc = (delta_x[np.newaxis, :] + 1j * delta_y[:, np.newaxis]).ravel()
+
+        div_time = np.full(dc.size, maxiter, dtype=int)
+        todo = np.arange(dc.size)
+        ref_re, ref_im, ref_offset = center_re, center_im, 0j
+
+        for attempt in range(MAX_REFERENCES):
+            orbit = reference_orbit(ref_re, ref_im, maxiter, degree, threshold)
+            result, glitched, glitch_abs = _iterate_deltas(
+                orbit,
+                dc[todo] - ref_offset,
+                maxiter,
+                degree,
+                use_series=attempt == 0,
+                r2=threshold**2,
+            )
+            div_time[todo] = result
+            if glitched.size == 0:
+                break
+
+            # re-reference at the glitched pixel that came closest to zero
+            pick = glitched[np.argmin(glitch_abs[glitched])]
+            ref_offset = dc[todo[pick]]
+            todo = todo[glitched]
+            ref_re = center_re + Decimal(ref_offset.real)
+            ref_im = center_im + Decimal(ref_offset.imag)
+
+    return div_time.reshape(shape)
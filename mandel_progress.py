@@ -0,0 +1,49 @@
+import time
+
+from utils import progress_bar
+
+# events per second that reach a consumer at most
+MAX_RATE = 10.0
+
+
+class ProgressReporter:
+    """Rate-limited progress of one calculation.
+
+    Forwards callback(iteration, total, live, elapsed) at most MAX_RATE times
+    per second, the first update and finish() always get through. live may be
+    a function, it is only evaluated for the events that are sent (counting
+    live pixels costs a reduction on the device).
+    """
+
+    def __init__(self, callback, total, max_rate=MAX_RATE):
+        self._callback = callback
+        self._total = total
+        self._interval = 1.0 / max_rate
+        self._start = time.perf_counter()
+        self._last = None
+
+    def update(self, iteration, live):
+        """Reports the finished iteration count, dropped if the last event is recent"""
+        now = time.perf_counter()
+        if self._last is not None and now - self._last < self._interval:
+            return
+        self._send(iteration, live, now)
+
+    def finish(self, live):
+        """Reports the end of the calculation, never dropped"""
+        self._send(self._total, live, time.perf_counter())
+
+    def _send(self, iteration, live, now):
+        self._last = now
+        if callable(live):
+            live = live()
+        self._callback(iteration, self._total, int(live), now - self._start)
+
+
+def console_progress(iteration, total, live, elapsed):
+    """Console bar (utils.progress_bar), removed once the calculation is done"""
+    progress_bar(iteration, total, remove=iteration == total)
+
+
+def null_progress(iteration, total, live, elapsed):
+    """Ignores every event"""
@@ -0,0 +1,106 @@
+import numpy as np
+
+
+class IterationState:
+    """Escape times of a view plus the orbits of the pixels that are still active.
+
+    advance() continues only the active pixels, so raising maxiter costs just
+    the extra iterations. The state can be stored as .npz via save()/load().
+    """
+
+    def __init__(
+        self, shape, bounds, degree, maxiter, div_time, active, z, threshold=2.0
+    ):
+        self.shape = tuple(shape)
+        self.bounds = tuple(str(b) for b in bounds)  # str keeps Decimal digits
+        self.degree = degree
+        self.threshold = threshold  # escape radius
+        self.maxiter = maxiter  # iterations done so far
+        self.div_time = div_time  # maxiter where still active
+        self.active = active  # flat indices of the pixels that did not escape
+        self.z = z  # orbit value of every active pixel
+
+    @classmethod
+    def start(cls, shape, bounds, degree, threshold=2.0):
+        size = shape[0] * shape[1]
+        return cls(
+            shape,
+            bounds,
+            degree,
+            0,
+            np.zeros(shape, dtype=np.uint32),  # maxiter grows with every advance
+            np.arange(size),
+            np.zeros(size, dtype=np.complex128),
+            threshold,
+        )
+
+    def matches(self, shape, bounds, degree, threshold=2.0) -> bool:
+        return (
+            self.shape == tuple(shape)
+            and self.bounds == tuple(str(b) for b in bounds)
+            and self.degree == degree
+            and self.threshold == threshold
+        )
+
+    def advance(self, maxiter, x, y) -> None:
+        """Iterates the active pixels of the view with axes x, y up to maxiter"""
+        if maxiter <= self.maxiter:
+            return
+
+        # mandel_all imports this module, so its helpers are imported late
+        from mandel_all import _check_degree, _complex_power
+
+        degree = _check_degree(self.degree)
+        r2 = self.threshold**2
+        width = self.shape[1]
+        active, z = self.active, self.z
+        c = x[active % width] + 1j * y[active // width]
+        div_time = self.div_time.reshape(-1)
+
+        for i in range(self.maxiter, maxiter):
+            # the same power and |z|^2 > r^2 test as the direct engines
+            power = np.empty_like(z)
+            _complex_power(z, power, degree, {})
+            z = power + c
+            escaped = z.real * z.real + z.imag * z.imag > r2
+            if escaped.any():
+                div_time[active[escaped]] = i
+                keep = ~escaped
+                active, z, c = active[keep], z[keep], c[keep]
+                if not active.size:
+                    break
+
+        div_time[active] = maxiter
+        self.active, self.z, self.maxiter = active, z, maxiter
+
+    def result(self, maxiter) -> np.ndarray:
+        """Escape times for any maxiter up to the iterations done so far"""
+        return np.minimum(self.div_time, maxiter)
+
+    def save(self, path) -> None:
+        np.savez(
+            path,
+            shape=self.shape,
+            bounds=np.array(self.bounds),
+            degree=self.degree,
+            maxiter=self.maxiter,
+            div_time=self.div_time,
+            active=self.active,
+            z=self.z,
+            threshold=self.threshold,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                tuple(int(s) for s in data["shape"]),
+                tuple(str(b) for b in data["bounds"]),
+                data["degree"].item(),
+                int(data["maxiter"]),
+                data["div_time"],
+                data["active"],
+                data["z"],
+                # states saved before the radius was stored used 2
+                float(data["threshold"]) if "threshold" in data else 2.0,
+            )
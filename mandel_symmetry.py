@@ -0,0 +1,43 @@
+import math
+
+import numpy as np
+
+
+def symmetric_rows(y_min, y_max, rows, endpoint=True):
+    """Plans the evaluation of a view that straddles the real axis.
+
+    Row k of the view has Im(c) = y_min + k * pitch. If the axis does not fall
+    on a row or exactly between two rows, the view is nudged by less than half
+    a pixel. Returns (y_min, y_max, first, last, source): the (nudged) bounds,
+    the block of rows [first, last] that has to be computed, and for every row
+    of the view the block row holding its value (or its conjugate).
+    Returns None if the view does not straddle the axis.
+    """
+    y_min, y_max = float(y_min), float(y_max)
+    if not (y_min < 0 < y_max) or rows < 2:
+        return None
+
+    pitch = (y_max - y_min) / (rows - 1 if endpoint else rows)
+    # rows k and m - k mirror each other
+    s = -2 * y_min / pitch
+    m = round(s)
+    if not math.isclose(s, m, rel_tol=0, abs_tol=1e-9):
+        nudge = (s - m) * pitch / 2
+        y_min, y_max = y_min + nudge, y_max + nudge
+
+    # keep the larger side (including the non-mirrored remainder)
+    if m >= rows - 1:
+        first, last = 0, m // 2
+    else:
+        first, last = (m + 1) // 2, rows - 1
+
+    k = np.arange(rows)
+    inside = (k >= first) & (k <= last)
+    source = np.where(inside, k, m - k) - first
+    return y_min, y_max, first, last, source
+
+
+def mirrored(rows, first, last):
+    """Marks the rows that are copies of conjugated block rows"""
+    k = np.arange(rows)
+    return (k < first) | (k > last)
@@ -1,10 +1,105 @@
 from abc import ABC, abstractmethod
+import collections
+import functools
 import numpy as np
+import tensorflow as tf
+
+from mandel_all import count_dtype
+from mandel_progress import ProgressReporter, console_progress, null_progress
+from mandel_symmetry import symmetric_rows
+
+# bumped from inside the traced Python functions, i.e. once per (re)trace
+_traces = collections.Counter()
+
+
+def trace_count() -> int:
+  """Number of tf.function traces of the TF engine kernels so far"""
+  return sum(_traces.values())
+
+
+def per_degree_kernel(*input_signature, jit_compile=False):
+  """Turns f(*args, degree) into a cached factory: f(degree) -> tf.function.
+
+  power() is unrolled for the degree, so each degree gets its own function.
+  Everything else is a tensor with dynamic shape (input_signature), a new
+  resolution or threshold never retraces. Functions taking tf.Variables
+  can't declare a signature, their variables are created with dynamic shapes.
+  """
+  def decorator(function):
+    name = f"{function.__module__}.{function.__name__}"
+
+    @functools.lru_cache(maxsize=None)
+    def kernel(degree):
+      def traced(*args):
+        _traces[name] += 1
+        return function(*args, degree=degree)
+
+      return tf.function(
+        traced, input_signature=input_signature or None, jit_compile=jit_compile
+      )
+
+    return kernel
+
+  return decorator
+
+
+# the compacted arrays shrink once less than this fraction of them is live
+SHRINK_FRACTION = 0.5
+
+
+def live_count(N: tf.Tensor, iteration: int):
+  """Deferred count of the pixels still live after iteration (N starts at 1)"""
+  return lambda: tf.reduce_sum(tf.cast(N > iteration, tf.int32))
+
+
+def iterate_compacted(step, C: tf.Tensor, threshold: tf.Tensor, iterations: int,
+                      progress: ProgressReporter):
+  """Iterates only the live pixels of C, returns (N, Z, mask) shaped like C.
+
+  step(z, c, n, live, threshold) -> (z, n, live, live_count) advances 1-D
+  arrays of pixels (rows of (re, im) without complex numbers) and freezes the
+  escaped ones. Once less than SHRINK_FRACTION is live, the finished pixels
+  are scattered into the full outputs in one go and dropped (tf.boolean_mask).
+  """
+  grid = C.shape[:2]
+  size = int(np.prod(grid))
+  c = tf.reshape(C, [size, *C.shape[2:]])
+  z = tf.zeros_like(c)
+  n = tf.ones([size], dtype=tf.float32)  # use ones because of log
+  live = tf.ones([size], dtype=tf.bool)
+  index = tf.range(size)[:, tf.newaxis]
+  N, Z, mask = n, z, live
+
+  def scatter(keep):
+    # write the pixels not in keep into the outputs
+    done = tf.logical_not(keep)
+    rows = tf.boolean_mask(index, done)
+    return (
+      tf.tensor_scatter_nd_update(N, rows, tf.boolean_mask(n, done)),
+      tf.tensor_scatter_nd_update(Z, rows, tf.boolean_mask(z, done)),
+      tf.tensor_scatter_nd_update(mask, rows, tf.boolean_mask(live, done)),
+    )
+
+  for idx in range(iterations):
+    z, n, live, count = step(z, c, n, live, threshold)
+    count = int(count)
+    if count < SHRINK_FRACTION * len(index):
+      N, Z, mask = scatter(live)
+      index, z, c, n = (tf.boolean_mask(t, live) for t in (index, z, c, n))
+      live = tf.ones([count], dtype=tf.bool)
+    progress.update(idx + 1, count)
+    if count == 0:
+      break
+
+  N, Z, mask = scatter(tf.zeros_like(live))
+  return tf.reshape(N, grid), tf.reshape(Z, C.shape), tf.reshape(mask, grid)
+
 
 class MandelBase(ABC):
   def __init__(self) -> None:
     self._inplace = False
     self._masking = False
+    self._symmetry = False
 
     self._x_min = -2.0
     self._x_max =  2.0
@@ -13,12 +108,21 @@ class MandelBase(ABC):
 
     self._threshold = 2.0
     self._iterations = int(100)
+    self._degree = 2
+    self._fused_loop = False
+    self._progress_callback = console_progress
 
     self._width  = int(800)
     self._height = int(800)
 
-    self.recalculate_c()
+    # axes of C, see _axes
+    self._x = None
+    self._y = None
+    self._rows = None
+    self._stale = True
     super().__init__()
+    # the first image of a new engine doesn't pay for tracing
+    self.warm_up()
 
   def set_functionality(self, inplace: bool, masking: bool) -> None:
     """Set which functionality should be used for calculation"""
@@ -32,6 +136,39 @@ class MandelBase(ABC):
     else:
       print("Warning: Wrong type for set_functionality (masking). Value not changed.")
 
+  def set_symmetry(self, symmetry: bool) -> None:
+    """Set whether views straddling the real axis only compute one half"""
+    if isinstance(symmetry, bool):
+      if symmetry != self._symmetry:
+        self._symmetry = symmetry
+        self._stale = True
+    else:
+      print("Warning: Wrong type for set_symmetry. Value not changed.")
+
+  def _plan_rows(self, rows: int, endpoint: bool):
+    """Mirror plan (see symmetric_rows) for the rows of C, None if not applicable"""
+    if not self._symmetry:
+      return None
+    return symmetric_rows(self._y_min, self._y_max, rows, endpoint)
+
+  def set_fused_loop(self, fused_loop: bool) -> None:
+    """Set whether the whole iteration loop runs as one XLA-compiled tf.while_loop"""
+    if isinstance(fused_loop, bool):
+      self._fused_loop = fused_loop
+    else:
+      print("Warning: Wrong type for set_fused_loop. Value not changed.")
+
+  def set_progress_callback(self, callback) -> None:
+    """Set the consumer of callback(iteration, total, live, elapsed) progress events.
+
+    Events arrive at most mandel_progress.MAX_RATE times per second, use
+    mandel_progress.null_progress to drop them.
+    """
+    if callable(callback):
+      self._progress_callback = callback
+    else:
+      print("Warning: Wrong type for set_progress_callback. Value not changed.")
+
   def set_threshold(self, value: float) -> None:
     """Set the threshold used while calculating the mandelbrot image"""
     if isinstance(value, float) or isinstance(value, int):
@@ -40,6 +177,14 @@ class MandelBase(ABC):
       print("Warning: Wrong type for set_threshold. Defaulting to 2.0.")
       self._threshold = 2.0
 
+  def set_degree(self, value: float) -> None:
+    """Set the exponent d of z^d + c (integer or real, at least 1)"""
+    if (isinstance(value, float) or isinstance(value, int)) and value >= 1:
+      self._degree = int(value) if int(value) == value else float(value)
+    else:
+      print("Warning: Wrong type for set_degree. Defaulting to 2.")
+      self._degree = 2
+
   def set_iterations(self, value: int) -> None:
     """Set the iteration count for calulating the mandelbrot image"""
     if isinstance(value, int) or isinstance(value, float):
@@ -66,7 +211,7 @@ class MandelBase(ABC):
       self._height  = int(800)
     
     if self._height != old_height or self._width != old_width:
-      self.recalculate_c()
+      self._stale = True
 
   def set_coordinates(self, x_min: float, x_max: float, y_min: float, y_max: float) -> None:
     """Set the coordinates of the image section"""
@@ -88,13 +233,45 @@ class MandelBase(ABC):
          self._x_max != old_x_max or \
          self._y_min != old_y_min or \
          self._y_max != old_y_max:
-        self.recalculate_c()
+        self._stale = True
     else:
       print("Warning: Wrong type for set_coordinates. Nothing will be changed.")
 
+  def warm_up(self) -> None:
+    """Trace the kernels of the current functionality and degree on a tiny grid.
+
+    Runs once when the engine is created (default functionality and degree),
+    call it again after set_functionality, set_fused_loop or set_degree to
+    trace those up front as well. XLA (set_fused_loop) still compiles once per
+    grid shape.
+    """
+    axis = np.array([0.0, 0.5])  # not the view, the axes stay deferred
+    self._iterate(axis, axis, 1, ProgressReporter(null_progress, 1))
+
+  def _progress(self) -> ProgressReporter:
+    """Reporter of one calculate_mandelbrot call"""
+    return ProgressReporter(self._progress_callback, self._iterations)
+
+  def _compact_counts(self, N: np.ndarray) -> np.ndarray:
+    """Counts of the device (float32, starting at 1) in the smallest integer dtype"""
+    return N.astype(count_dtype(self._iterations + 1))
+
+  def _axes(self):
+    """x and y vectors of C, recalculated on first use after a setter changed them"""
+    if self._stale:
+      self.recalculate_c()
+      self._stale = False
+    return self._x, self._y
+
   @abstractmethod
   def recalculate_c(self) -> None:
-    """Recalculates the C matrix. Called by constructor, set_resolution and set_coordinates!"""
+    """Recalculates the axes of C (_x, _y) and _rows. Called by _axes!"""
+    raise NotImplementedError("Abstract function called")
+
+  @abstractmethod
+  def _iterate(self, x: np.ndarray, y: np.ndarray, iterations: int,
+               progress: ProgressReporter):
+    """Iterates the grid c = x + iy, returns the device tensors of the engine"""
     raise NotImplementedError("Abstract function called")
 
   @abstractmethod
@@ -1,119 +1,191 @@
-from utils import messure, progress_bar
-from mandelbase import MandelBase
+from utils import messure
+from mandelbase import MandelBase, iterate_compacted, live_count, per_degree_kernel
+from mandel_progress import ProgressReporter
 import numpy as np
 import tensorflow as tf
 
+from mandel_symmetry import mirrored
+
 
 class MandelComplex(MandelBase):
     def __init__(self) -> None:
         super().__init__()
 
     def recalculate_c(self) -> None:
-        y = np.repeat(
-            np.linspace(self._y_min, self._y_max, self._width, False, dtype=np.float64),
-            self._height,
-            axis=0,
-        ).reshape((self._width, self._height))
-        x = np.repeat(
-            [
-                np.linspace(
-                    self._x_min, self._x_max, self._height, False, dtype=np.float64
-                )
-            ],
-            self._width,
-            axis=0,
+        # rows of C are the imaginary axis (width values, end point excluded)
+        self._rows = self._plan_rows(self._width, endpoint=False)
+        y_min, y_max = self._y_min, self._y_max
+        if self._rows is not None:
+            y_min, y_max = self._rows[:2]
+        self._y = np.linspace(y_min, y_max, self._width, False, dtype=np.float64)
+        self._x = np.linspace(
+            self._x_min, self._x_max, self._height, False, dtype=np.float64
         )
-        self._c = x + 1j * y
 
     @messure
     def calculate_mandelbrot(self) -> np.ndarray:
-        C: tf.Tensor = tf.constant(self._c)
-        Z = tf.Variable(tf.zeros_like(self._c))
-        N = tf.Variable(
-            tf.ones((self._width, self._height), dtype=tf.float64)
-        )  # use ones because of log
-        conv = tf.Variable(tf.ones((self._width, self._height), dtype=tf.float64))
-        mask = tf.Variable(tf.ones(N.shape, dtype=tf.bool))
-
-        progress_bar(0, self._iterations)
+        x, y = self._axes()
+        if self._rows is not None:
+            # conjugate symmetry: only iterate one half of the view
+            _, _, first, last, _ = self._rows
+            y = y[first : last + 1]
+
+        N, Z, mask = self._iterate(x, y, self._iterations, self._progress())
+
+        N, Z, mask = self._compact_counts(N.numpy()), Z.numpy(), mask.numpy()
+        if self._rows is not None:
+            _, _, first, last, source = self._rows
+            N, Z, mask = N[source], Z[source], mask[source]
+            flip = mirrored(self._width, first, last)
+            Z[flip] = np.conj(Z[flip])
+        return N, Z, mask
+
+    def _iterate(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        iterations: int,
+        progress: ProgressReporter,
+    ):
+        # broadcast on the device, the host never holds a grid of C
+        re = tf.cast(tf.constant(x), tf.complex128)
+        im = tf.complex(tf.zeros_like(y), tf.constant(y))
+        C: tf.Tensor = re[tf.newaxis, :] + im[:, tf.newaxis]
+        threshold = tf.constant(self._threshold, dtype=tf.float64)
+        Z = tf.zeros_like(C)
+        N = tf.ones(C.shape, dtype=tf.float32)  # use ones because of log
+        conv = tf.ones(C.shape, dtype=tf.float32)
+        mask = tf.ones(C.shape, dtype=tf.bool)
+
+        progress.update(0, len(x) * len(y))
         # print(self._masking, self._inplace, "II") ;
 
-        if self._inplace:
-            if self._masking:
-                for idx in range(self._iterations):
-                    Zw = tf.constant(Z)  # workaround for gather_nd
-                    step_inplace_masking(Z, Zw, C, N, mask, self._threshold)
-                    progress_bar(idx, self._iterations)
-            else:
-                for idx in range(self._iterations):
-                    step_inplace(Z, C, N, conv, self._threshold)
-                    progress_bar(idx, self._iterations)
+        if self._fused_loop:
+            # one kernel call, no per-iteration dispatch
+            N, Z, mask = iterate(C, threshold, iterations, self._degree)
+        elif self._masking:
+            # compacted arrays of the live pixels, in place or not
+            kernel = step_compacted(self._degree)
+            N, Z, mask = iterate_compacted(kernel, C, threshold, iterations, progress)
+        elif self._inplace:
+            # variables can't be part of an input_signature, dynamic shapes
+            # keep these kernels from retracing for a new resolution instead
+            C, Z, N, conv = (
+                tf.Variable(value, shape=GRID_SHAPE, trainable=False)
+                for value in (C, Z, N, conv)
+            )
+            kernel = step_inplace(self._degree)
+            for idx in range(iterations):
+                kernel(Z, C, N, conv, threshold)
+                progress.update(idx + 1, live_count(N, idx + 1))
         else:
-            if self._masking:
-                Z = tf.constant(Z)  # workaround for gather_nd
-                for idx in range(self._iterations):
-                    Z, N, mask = step_masking(Z, C, N, mask, self._threshold)
-                    progress_bar(idx, self._iterations)
-            else:
-                for idx in range(self._iterations):
-                    Z, N, conv = step(Z, C, N, conv, self._threshold)
-                    progress_bar(idx, self._iterations)
-
-        progress_bar(self._iterations, self._iterations, True)
-
-        return N.numpy(), Z.numpy(), mask.numpy()
-
-
-@tf.function
+            kernel = step(self._degree)
+            for idx in range(iterations):
+                Z, N, conv = kernel(Z, C, N, conv, threshold)
+                progress.update(idx + 1, live_count(N, idx + 1))
+
+        progress.finish(live_count(N, iterations))
+        return N, Z, mask
+
+
+def power(Z: tf.Tensor, degree) -> tf.Tensor:
+    """Z**degree, binary addition chain for integer degrees, polar form otherwise"""
+    if int(degree) != degree:
+        r = tf.abs(Z) ** degree
+        angle = tf.math.angle(Z) * degree
+        return tf.complex(r * tf.cos(angle), r * tf.sin(angle))
+    P = Z
+    for bit in bin(int(degree))[3:]:
+        P = P * P
+        if bit == "1":
+            P = P * Z
+    return P
+
+
+# any grid shape and threshold, see per_degree_kernel
+GRID_SHAPE = tf.TensorShape([None, None])
+_GRID = tf.TensorSpec(GRID_SHAPE, tf.complex128)
+_COUNTS = tf.TensorSpec(GRID_SHAPE, tf.float32)
+_SCALAR = tf.TensorSpec([], tf.float64)
+_LIVE = tf.TensorSpec([None], tf.complex128)
+_LIVE_COUNTS = tf.TensorSpec([None], tf.float32)
+_LIVE_MASK = tf.TensorSpec([None], tf.bool)
+
+
+def iterate(C: tf.Tensor, threshold: tf.Tensor, iterations: int, degree=2):
+    """All iterations in one XLA-compiled tf.while_loop, returns (N, Z, mask).
+
+    Escaped pixels keep their Z, the loop ends early once every pixel escaped.
+    """
+    threshold = tf.convert_to_tensor(threshold, dtype=tf.float64)
+    return loop(degree)(C, threshold, tf.constant(iterations))
+
+
+@per_degree_kernel(_GRID, _SCALAR, tf.TensorSpec([], tf.int32), jit_compile=True)
+def loop(C, threshold, iterations, degree=2):
+    def cond(i, Z, N, mask):
+        return tf.logical_and(i < iterations, tf.reduce_any(mask))
+
+    def body(i, Z, N, mask):
+        Z = tf.where(mask, power(Z, degree) + C, Z)
+        mask = tf.abs(Z) < threshold
+        return i + 1, Z, N + tf.cast(mask, tf.float32), mask
+
+    start = (
+        tf.constant(0),
+        tf.zeros_like(C),
+        tf.ones(tf.shape(C), dtype=tf.float32),  # use ones because of log
+        tf.ones(tf.shape(C), dtype=tf.bool),
+    )
+    _, Z, N, mask = tf.while_loop(cond, body, start)
+    return N, Z, mask
+
+
+@per_degree_kernel(_GRID, _GRID, _COUNTS, _COUNTS, _SCALAR)
 def step(
-    Z: tf.Tensor, C: tf.Tensor, N: tf.Tensor, mask: tf.Tensor, threshold: float
+    Z: tf.Tensor,
+    C: tf.Tensor,
+    N: tf.Tensor,
+    mask: tf.Tensor,
+    threshold: tf.Tensor,
+    degree=2,
 ) -> tuple[tf.Tensor, tf.Tensor]:
     # conv = tf.cast(tf.abs(Z) < threshold,dtype=tf.float64) ;
     cconv = tf.cast(mask, tf.complex128)
-    Zn: tf.Tensor = Z * (1.0 - cconv) + cconv * (Z**2 + C)
+    Zn: tf.Tensor = Z * (1.0 - cconv) + cconv * (power(Z, degree) + C)
     ## do not continue iteration after divergence occured, only where we are still convergent
-    _mask = tf.cast(tf.abs(Zn) < threshold, tf.float64)
+    _mask = tf.cast(tf.abs(Zn) < threshold, tf.float32)
     Nn = tf.add(N, _mask)
     return Zn, Nn, _mask
 
 
 # this is suboptimal since iteration is performed everywhere
-@tf.function
+@per_degree_kernel()
 def step_inplace(
-    Z: tf.Variable, C: tf.Tensor, N: tf.Variable, mask: tf.Tensor, threshold: float
+    Z: tf.Variable,
+    C: tf.Variable,
+    N: tf.Variable,
+    mask: tf.Variable,
+    threshold: tf.Tensor,
+    degree=2,
 ) -> None:
     cconv = tf.cast(mask, tf.complex128)
-    Z.assign(Z * (1.0 - cconv) + cconv * (Z**2 + C))
-    mask.assign(tf.cast((tf.abs(Z) < threshold), tf.float64))
+    Z.assign(Z * (1.0 - cconv) + cconv * (power(Z, degree) + C))
+    mask.assign(tf.cast((tf.abs(Z) < threshold), tf.float32))
     N.assign_add(mask)
 
 
-# this is suboptimal since iteration is performed everywhere
-@tf.function
-def step_masking(
-    Z: tf.Tensor, C: tf.Tensor, N: tf.Tensor, mask: tf.Tensor, threshold: float
-) -> tuple[tf.Tensor, tf.Tensor, tf.Tensor]:
-    indices = tf.where(mask)
-    Zm = tf.gather_nd(Z, indices)
-    Cm = tf.gather_nd(C, indices)
-    Zn = tf.tensor_scatter_nd_update(Z, indices, Zm**2 + Cm)
-    maskn = tf.abs(Zn) < threshold
-    Nn = tf.add(N, tf.cast(maskn, tf.float64))
-    return Zn, Nn, maskn
-
-
-@tf.function  # Zw is a workaround as gather_nd has problems with tf.Variable with dtype=complex
-def step_inplace_masking(
-    Z: tf.Variable,
-    Zw: tf.Tensor,
-    C: tf.Tensor,
-    N: tf.Variable,
-    mask: tf.Variable,
-    threshold: float,
-) -> None:
-    indices = tf.where(mask)
-    Zm = tf.gather_nd(Zw, indices)
-    Cm = tf.gather_nd(C, indices)
-    Z.assign(tf.tensor_scatter_nd_update(Z, indices, Zm**2 + Cm))
-    mask.assign(tf.abs(Z) < threshold)
-    N.assign_add(tf.cast(mask, tf.float64))
+@per_degree_kernel(_LIVE, _LIVE, _LIVE_COUNTS, _LIVE_MASK, _SCALAR)
+def step_compacted(
+    z: tf.Tensor,
+    c: tf.Tensor,
+    n: tf.Tensor,
+    live: tf.Tensor,
+    threshold: tf.Tensor,
+    degree=2,
+) -> tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]:
+    # z, c, n, live are 1-D compacted pixels, see iterate_compacted
+    z = tf.where(live, power(z, degree) + c, z)
+    live = tf.abs(z) < threshold
+    count = tf.reduce_sum(tf.cast(live, tf.int32))
+    return z, n + tf.cast(live, tf.float32), live, count
@@ -1,5 +1,6 @@
-from utils import messure, progress_bar
-from mandelbase import MandelBase
+from utils import messure
+from mandelbase import MandelBase, iterate_compacted, live_count, per_degree_kernel
+from mandel_progress import ProgressReporter
 import numpy as np
 import tensorflow as tf
 
@@ -9,112 +10,190 @@ class MandelNoComplex(MandelBase):
         super().__init__()
 
     def recalculate_c(self) -> None:
-        im = np.repeat(
-            np.linspace(self._y_min, self._y_max, self._height).reshape((1, -1)),
-            self._width,
-            axis=0,
-        ).T
-        re = np.repeat(
-            np.linspace(self._x_min, self._x_max, self._width).reshape((1, -1)),
-            self._height,
-            axis=0,
-        )
-        self._c = np.stack((re, im), axis=2)
+        self._rows = self._plan_rows(self._height, endpoint=True)
+        y_min, y_max = self._y_min, self._y_max
+        if self._rows is not None:
+            y_min, y_max = self._rows[:2]
+        self._y = np.linspace(y_min, y_max, self._height)
+        self._x = np.linspace(self._x_min, self._x_max, self._width)
 
     @messure
     def calculate_mandelbrot(self) -> np.ndarray:
+        x, y = self._axes()
+        if self._rows is not None:
+            # conjugate symmetry: only iterate one half of the view
+            _, _, first, last, _ = self._rows
+            y = y[first : last + 1]
+
+        N = self._iterate(x, y, self._iterations, self._progress())
+        N = self._compact_counts(N.numpy())
+        if self._rows is not None:
+            return N[self._rows[4]]
+        return N
+
+    def _iterate(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        iterations: int,
+        progress: ProgressReporter,
+    ):
         negate = tf.constant([[1.0, -1.0]], dtype=tf.float64)
-        C = tf.constant(self._c)
-        Z = tf.Variable(np.zeros_like(self._c))
-        N = tf.Variable(
-            np.ones((self._height, self._width)), dtype=tf.float64
-        )  # use ones because of log
-
-        progress_bar(0, self._iterations)
-
-        if self._inplace:
-            if self._masking:
-                mask = tf.Variable(tf.ones(N.shape, dtype=tf.bool))
-                for idx in range(self._iterations):
-                    step_inplace_masking(Z, C, N, negate, mask, self._threshold)
-                    progress_bar(idx, self._iterations)
-            else:
-                for idx in range(self._iterations):
-                    step_inplace(Z, C, N, negate, self._threshold)
-                    progress_bar(idx, self._iterations)
+        threshold = tf.constant(self._threshold, dtype=tf.float64)
+        # broadcast on the device, the host never holds a grid of C
+        grid = (len(y), len(x))
+        C = tf.stack(
+            (
+                tf.broadcast_to(tf.constant(x)[tf.newaxis, :], grid),
+                tf.broadcast_to(tf.constant(y)[:, tf.newaxis], grid),
+            ),
+            axis=2,
+        )
+        Z = tf.zeros_like(C)
+        # use ones because of log, float32 counts are exact up to 2^24
+        N = tf.ones(grid, dtype=tf.float32)
+
+        progress.update(0, len(x) * len(y))
+
+        if self._fused_loop:
+            # one kernel call, no per-iteration dispatch
+            N = iterate(C, threshold, iterations, self._degree)
+        elif self._masking:
+            # compacted arrays of the live pixels, in place or not
+            kernel = step_compacted(self._degree)
+            N, _, _ = iterate_compacted(kernel, C, threshold, iterations, progress)
+        elif self._inplace:
+            # variables can't be part of an input_signature, dynamic shapes
+            # keep these kernels from retracing for a new resolution instead
+            C, Z = (
+                tf.Variable(value, shape=PLANE_SHAPE, trainable=False)
+                for value in (C, Z)
+            )
+            N = tf.Variable(N, shape=GRID_SHAPE, trainable=False)
+            kernel = step_inplace(self._degree)
+            for idx in range(iterations):
+                kernel(Z, C, N, negate, threshold)
+                progress.update(idx + 1, live_count(N, idx + 1))
         else:
-            if self._masking:
-                mask = tf.ones(N.shape, dtype=tf.bool)
-                for idx in range(self._iterations):
-                    Z, N, mask = step_masking(Z, C, N, negate, mask, self._threshold)
-                    progress_bar(idx, self._iterations)
-            else:
-                for idx in range(self._iterations):
-                    Z, N = step(Z, C, N, negate, self._threshold)
-                    progress_bar(idx, self._iterations)
-
-        progress_bar(self._iterations, self._iterations, True)
-
-        return N.numpy()
-
-
-@tf.function
+            kernel = step(self._degree)
+            for idx in range(iterations):
+                Z, N = kernel(Z, C, N, negate, threshold)
+                progress.update(idx + 1, live_count(N, idx + 1))
+
+        progress.finish(live_count(N, iterations))
+        return N
+
+
+def power(Z: tf.Tensor, negate: tf.Tensor, degree, axis: int):
+    """Real and imaginary part of Z**degree, Z holding (re, im) along axis"""
+    if degree == 2:
+        re = tf.reduce_sum(Z**2 * negate, axis=axis)
+        return re, tf.reduce_prod(Z, axis=axis) * 2
+    zr, zi = tf.unstack(Z, axis=axis)
+    if int(degree) != degree:
+        # polar form for real degrees
+        r = (zr * zr + zi * zi) ** (degree / 2)
+        angle = tf.math.atan2(zi, zr) * degree
+        return r * tf.cos(angle), r * tf.sin(angle)
+    # binary addition chain for integer degrees
+    pr, pi = zr, zi
+    for bit in bin(int(degree))[3:]:
+        pr, pi = pr * pr - pi * pi, 2 * pr * pi
+        if bit == "1":
+            pr, pi = pr * zr - pi * zi, pr * zi + pi * zr
+    return pr, pi
+
+
+# any grid shape and threshold, see per_degree_kernel
+GRID_SHAPE = tf.TensorShape([None, None])
+PLANE_SHAPE = tf.TensorShape([None, None, 2])
+_PLANE = tf.TensorSpec(PLANE_SHAPE, tf.float64)
+_COUNTS = tf.TensorSpec(GRID_SHAPE, tf.float32)
+_NEGATE = tf.TensorSpec([1, 2], tf.float64)
+_SCALAR = tf.TensorSpec([], tf.float64)
+_LIVE = tf.TensorSpec([None, 2], tf.float64)
+_LIVE_COUNTS = tf.TensorSpec([None], tf.float32)
+_LIVE_MASK = tf.TensorSpec([None], tf.bool)
+
+
+def iterate(
+    C: tf.Tensor, threshold: tf.Tensor, iterations: int, degree=2
+) -> tf.Tensor:
+    """All iterations in one XLA-compiled tf.while_loop, returns N.
+
+    Escaped pixels stop iterating, the loop ends early once all escaped.
+    """
+    threshold = tf.convert_to_tensor(threshold, dtype=tf.float64)
+    return loop(degree)(C, threshold, tf.constant(iterations))
+
+
+@per_degree_kernel(_PLANE, _SCALAR, tf.TensorSpec([], tf.int32), jit_compile=True)
+def loop(C, threshold, iterations, degree=2):
+    negate = tf.constant([[1.0, -1.0]], dtype=tf.float64)
+
+    def cond(i, Z, N, mask):
+        return tf.logical_and(i < iterations, tf.reduce_any(mask))
+
+    def body(i, Z, N, mask):
+        re, im = power(Z, negate, degree, axis=2)
+        Z = tf.where(mask[..., tf.newaxis], tf.stack((re, im), axis=2) + C, Z)
+        mask = tf.sqrt(tf.reduce_sum(Z**2, axis=2)) < threshold
+        return i + 1, Z, N + tf.cast(mask, tf.float32), mask
+
+    start = (
+        tf.constant(0),
+        tf.zeros_like(C),
+        tf.ones(tf.shape(C)[:2], dtype=tf.float32),  # use ones because of log
+        tf.ones(tf.shape(C)[:2], dtype=tf.bool),
+    )
+    _, Z, N, mask = tf.while_loop(cond, body, start)
+    return N
+
+
+@per_degree_kernel(_PLANE, _PLANE, _COUNTS, _NEGATE, _SCALAR)
 def step(
-    Z: tf.Tensor, C: tf.Tensor, N: tf.Tensor, negate: tf.Tensor, threshold: float
+    Z: tf.Tensor,
+    C: tf.Tensor,
+    N: tf.Tensor,
+    negate: tf.Tensor,
+    threshold: tf.Tensor,
+    degree=2,
 ) -> tuple[tf.Tensor, tf.Tensor]:
-    re = tf.reduce_sum(Z**2 * negate, axis=2)
-    im = tf.reduce_prod(Z, axis=2) * 2
+    re, im = power(Z, negate, degree, axis=2)
     Zn = tf.stack((re, im), axis=2) + C
     conv = tf.sqrt(tf.reduce_sum(Zn**2, axis=2)) < threshold
-    Nn = tf.add(N, tf.cast(conv, tf.float64))
+    Nn = tf.add(N, tf.cast(conv, tf.float32))
     return Zn, Nn
 
 
-@tf.function
+@per_degree_kernel()
 def step_inplace(
-    Z: tf.Variable, C: tf.Tensor, N: tf.Variable, negate: tf.Tensor, threshold: float
-) -> None:
-    re = tf.reduce_sum(Z**2 * negate, axis=2)
-    im = tf.reduce_prod(Z, axis=2) * 2
-    Z.assign(tf.stack((re, im), axis=2) + C)
-    conv = tf.sqrt(tf.reduce_sum(Z**2, axis=2)) < threshold
-    N.assign_add(tf.cast(conv, tf.float64))
-
-
-@tf.function
-def step_masking(
-    Z: tf.Tensor,
-    C: tf.Tensor,
-    N: tf.Tensor,
-    negate: tf.Tensor,
-    mask: tf.Tensor,
-    threshold: float,
-) -> tuple[tf.Tensor, tf.Tensor, tf.Tensor]:
-    indices = tf.where(mask)
-    Zm = tf.gather_nd(Z, indices)
-    Cm = tf.gather_nd(C, indices)
-    re = tf.reduce_sum(Zm**2 * negate, axis=1)
-    im = tf.reduce_prod(Zm, axis=1) * 2
-    Zn = tf.tensor_scatter_nd_update(Z, indices, tf.stack((re, im), axis=1) + Cm)
-    maskn = tf.sqrt(tf.reduce_sum(Zn**2, axis=2)) < threshold
-    Nn = tf.add(N, tf.cast(maskn, tf.float64))
-    return Zn, Nn, maskn
-
-
-@tf.function
-def step_inplace_masking(
     Z: tf.Variable,
-    C: tf.Tensor,
+    C: tf.Variable,
     N: tf.Variable,
     negate: tf.Tensor,
-    mask: tf.Variable,
-    threshold: float,
+    threshold: tf.Tensor,
+    degree=2,
 ) -> None:
-    indices = tf.where(mask)
-    Zm = tf.gather_nd(Z, indices)
-    Cm = tf.gather_nd(C, indices)
-    re = tf.reduce_sum(Zm**2 * negate, axis=1)
-    im = tf.reduce_prod(Zm, axis=1) * 2
-    Z.assign(tf.tensor_scatter_nd_update(Z, indices, tf.stack((re, im), axis=1) + Cm))
-    mask.assign(tf.sqrt(tf.reduce_sum(Z**2, axis=2)) < threshold)
-    N.assign_add(tf.cast(mask, tf.float64))
+    re, im = power(Z, negate, degree, axis=2)
+    Z.assign(tf.stack((re, im), axis=2) + C)
+    conv = tf.sqrt(tf.reduce_sum(Z**2, axis=2)) < threshold
+    N.assign_add(tf.cast(conv, tf.float32))
+
+
+@per_degree_kernel(_LIVE, _LIVE, _LIVE_COUNTS, _LIVE_MASK, _SCALAR)
+def step_compacted(
+    z: tf.Tensor,
+    c: tf.Tensor,
+    n: tf.Tensor,
+    live: tf.Tensor,
+    threshold: tf.Tensor,
+    degree=2,
+) -> tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]:
+    # z, c are (re, im) rows of the compacted pixels, see iterate_compacted
+    negate = tf.constant([[1.0, -1.0]], dtype=tf.float64)
+    re, im = power(z, negate, degree, axis=1)
+    z = tf.where(live[:, tf.newaxis], tf.stack((re, im), axis=1) + c, z)
+    live = tf.sqrt(tf.reduce_sum(z**2, axis=1)) < threshold
+    count = tf.reduce_sum(tf.cast(live, tf.int32))
+    return z, n + tf.cast(live, tf.float32), live, count
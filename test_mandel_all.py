@@ -21,7 +21,7 @@ for config in configs:
 
     # Check result type and shape
     assert result.shape == shape, f"Shape mismatch: expected {shape}, got {result.shape}"
-    assert result.dtype in ["int32", "int64", "float64", "float32"], f"Unexpected dtype: {result.dtype}"
+    assert result.dtype in ["uint8", "uint16", "uint32", "int32", "int64", "float64", "float32"], f"Unexpected dtype: {result.dtype}"
 
     # Show result briefly
     plt.imshow(result, cmap="turbo")
@@ -0,0 +1,693 @@
+import numpy as np
+import pytest
+
+from compute import ComputeApp
+from mandel_all import (
+    STREAM_BYTES_PER_PIXEL,
+    MandelbrotCalculator,
+    count_dtype,
+    grid_axes,
+)
+from mandel_cache import TileCache
+from mandel_job import RenderJob
+from mandel_resume import IterationState
+
+# small views keep the tests fast, odd sizes catch off-by-one tiling errors
+shape = (61, 83)  # height, width
+bounds = (-2.0, 1.0, -1.2, 1.3)  # x_min, x_max, y_min, y_max
+maxiter = 50
+
+configs = [
+    {"use_complex": True, "in_place": False, "use_mask": False},
+    {"use_complex": True, "in_place": True, "use_mask": False},
+    {"use_complex": True, "in_place": True, "use_mask": True},
+    {"use_complex": False, "in_place": False, "use_mask": False},
+    {"use_complex": False, "in_place": True, "use_mask": True},
+]
+
+
+def test_tiled_matches_single_process():
+    for config in configs:
+        expected = MandelbrotCalculator(**config).compute(shape, bounds, maxiter)
+
+        tiled = MandelbrotCalculator(**config, tile_size=16).compute(
+            shape, bounds, maxiter
+        )
+        assert np.array_equal(tiled, expected), f"tiled mismatch: {config}"
+
+        parallel = MandelbrotCalculator(**config, workers=2, tile_size=32).compute(
+            shape, bounds, maxiter
+        )
+        assert np.array_equal(parallel, expected), f"parallel mismatch: {config}"
+
+
+def test_worker_pool_exits_after_numba():
+    # forked workers used to hang the interpreter once numba's threads ran
+    import subprocess
+    import sys
+
+    script = (
+        "from mandel_all import MandelbrotCalculator as M\n"
+        "from mandel_cache import TileCache\n"
+        "M(use_numba=True).compute((40, 50), (-2, 1, -1, 1), 50)\n"
+        "M(workers=2, tile_size=16, tile_cache=TileCache()).compute(\n"
+        "    (41, 50), (-2, 1, -1, 1), 50)\n"
+    )
+    done = subprocess.run([sys.executable, "-c", script], timeout=120)
+    assert done.returncode == 0
+
+
+def test_numba_matches_numpy():
+    pytest.importorskip("numba")
+    for degree in (2, 3, 4, 5):
+        expected = MandelbrotCalculator(in_place=True, use_mask=True).compute(
+            shape, bounds, maxiter, degree
+        )
+        result = MandelbrotCalculator(use_numba=True).compute(
+            shape, bounds, maxiter, degree
+        )
+        # numpy's SIMD complex arithmetic rounds differently from the scalar loop,
+        # which may flip single chaotic boundary pixels
+        assert result.shape == expected.shape
+        assert np.mean(result != expected) < 1e-3, f"degree {degree}"
+
+
+def test_skip_interior_is_exact():
+    for config in configs:
+        expected = MandelbrotCalculator(**config).compute(shape, bounds, 200)
+        result = MandelbrotCalculator(**config, skip_interior=True).compute(
+            shape, bounds, 200
+        )
+        assert np.array_equal(result, expected), f"interior mismatch: {config}"
+
+
+def test_periodicity_detects_cycles():
+    # c = 0 (fixed point), c = -1 (2-cycle), c = i (preperiodic, 2-cycle), c = 1 (escapes)
+    cx = np.array([0.0, -1.0, 0.0, 1.0])
+    cy = np.array([0.0, 0.0, 1.0, 0.0])
+    for config in configs:
+        calc = MandelbrotCalculator(**config, periodicity=True, return_period=True)
+        div_time, period = calc.compute_points(cx, cy, 100)
+        assert list(div_time[:3]) == [100, 100, 100], f"{config}"
+        assert div_time[3] < 100, f"{config}"
+        assert list(period) == [1, 2, 2, 0], f"{config}"
+
+        expected = MandelbrotCalculator(**config).compute(shape, bounds, 200)
+        result, _ = calc.compute(shape, bounds, 200)
+        assert np.array_equal(result, expected), f"periodicity mismatch: {config}"
+
+
+def test_subdivision_is_exact_on_these_views():
+    # the full view has a uniform border around the whole set
+    for view in (bounds, (-2.0, 2.0, -2.0, 2.0)):
+        for config in configs:
+            expected = MandelbrotCalculator(**config).compute(shape, view, maxiter)
+            calc = MandelbrotCalculator(**config, subdivide=True, min_rect_size=4)
+            result = calc.compute(shape, view, maxiter)
+            assert np.array_equal(result, expected), f"mismatch: {config} {view}"
+            stats = calc.last_stats
+            assert stats["iterated"] + stats["filled"] == shape[0] * shape[1]
+            assert stats["filled"] > 0
+
+
+def test_progressive_levels():
+    calc = MandelbrotCalculator()
+    levels = list(calc.compute_progressive(shape, bounds, maxiter))
+    assert [step for step, _ in levels] == [8, 4, 2, 1]
+    assert all(image.shape == shape for _, image in levels)
+
+    stats = calc.last_stats
+    assert stats["iterated"] + stats["filled"] == shape[0] * shape[1]
+    # solid guessing may miss thin filaments, but only a few of them
+    expected = MandelbrotCalculator().compute(shape, bounds, maxiter)
+    assert np.mean(levels[-1][1] != expected) < 0.01
+    assert np.array_equal(calc.compute_refined(shape, bounds, maxiter), levels[-1][1])
+
+
+def test_perturbation_matches_direct_iteration():
+    expected = MandelbrotCalculator().compute(shape, bounds, maxiter)
+    result = MandelbrotCalculator(deep_zoom=True).compute(shape, bounds, maxiter)
+    assert np.array_equal(result, expected)
+
+    zoom = (-0.7437, -0.7436, 0.1318, 0.13188)
+    expected = MandelbrotCalculator().compute(shape, zoom, 500)
+    result = MandelbrotCalculator(deep_zoom=True).compute(shape, zoom, 500)
+    assert np.mean(result != expected) < 0.01
+
+
+def test_single_row_views_stay_on_float64():
+    from mandel_perturbation import needs_deep_zoom
+
+    row = MandelbrotCalculator().compute((1, 50), (-2.0, 1.0, 0.5, 0.5), 50, 2.5)
+    x, _ = grid_axes((1, 50), (-2.0, 1.0, 0.5, 0.5))
+    expected = MandelbrotCalculator().compute_points(x, 0.5, 50, 2.5)
+    assert np.array_equal(row[0], expected)
+    assert not needs_deep_zoom((50, 1), (0.25, 0.25, -1.0, 1.0))
+    assert needs_deep_zoom((1, 50), ("-0.75", "-0.7499999999999999", "0.1", "0.1"))
+
+
+def test_deep_zoom_keeps_string_precision():
+    # 1e-18 wide, far below the float64 spacing around -2
+    view = ("-1.999999999138270119", "-1.999999999138270117", "-1e-18", "1e-18")
+    result = MandelbrotCalculator().compute((40, 50), view, 1000)
+    collapsed = MandelbrotCalculator().compute(
+        (40, 50), tuple(float(b) for b in view), 1000
+    )
+    assert len(np.unique(result)) > 2 * len(np.unique(collapsed))
+
+
+def test_resumed_iterations_match_direct(tmp_path):
+    calc = MandelbrotCalculator(resumable=True)
+    first = calc.compute(shape, bounds, 100)
+    assert calc.last_stats["resumed_from"] == 0
+
+    result = calc.compute(shape, bounds, 300)
+    assert calc.last_stats["resumed_from"] == 100
+    expected = MandelbrotCalculator().compute(shape, bounds, 300)
+    assert np.array_equal(result, expected)
+    # lower iteration counts are answered from the stored escape times
+    assert np.array_equal(calc.compute(shape, bounds, 100), first)
+
+    path = tmp_path / "state.npz"
+    calc.iteration_state.save(path)
+    restored = MandelbrotCalculator(resumable=True)
+    restored.iteration_state = IterationState.load(path)
+    result = restored.compute(shape, bounds, 500)
+    assert restored.last_stats["resumed_from"] == 300
+    assert np.array_equal(result, MandelbrotCalculator().compute(shape, bounds, 500))
+
+    # real degrees use the same polar power and squared-radius test
+    for threshold in (2.0, 3.0):
+        calc = MandelbrotCalculator(resumable=True, threshold=threshold)
+        calc.compute(shape, bounds, 60, 2.5)
+        expected = MandelbrotCalculator(threshold=threshold).compute(
+            shape, bounds, 200, 2.5
+        )
+        assert np.array_equal(calc.compute(shape, bounds, 200, 2.5), expected)
+
+    for option in ({"use_numba": True}, {"symmetry": True}, {"workers": 2}):
+        with pytest.raises(ValueError, match="resumable"):
+            MandelbrotCalculator(resumable=True, **option).compute(shape, bounds, 50)
+
+
+def test_tile_cache_assembles_aligned_views(tmp_path):
+    # level 3 with 16 pixel tiles: pitch 1/32, the view starts at pixel (10, 21)
+    view_shape = (40, 48)
+    view = (-2 + 10 / 32, -2 + 57 / 32, -2 + 21 / 32, -2 + 60 / 32)
+    expected = MandelbrotCalculator().compute(view_shape, view, maxiter)
+
+    cache = TileCache(directory=tmp_path)
+    calc = MandelbrotCalculator(tile_size=16, tile_cache=cache)
+    result = calc.compute(view_shape, view, maxiter)
+    assert np.array_equal(result, expected)
+    assert cache.stats["hits"] == 0 and cache.stats["misses"] == 4 * 3
+
+    # a shifted view reuses the overlapping tiles
+    shifted = (view[0] + 16 / 32, view[1] + 16 / 32, view[2], view[3])
+    result = calc.compute(view_shape, shifted, maxiter)
+    expected_shifted = MandelbrotCalculator().compute(view_shape, shifted, maxiter)
+    assert np.array_equal(result, expected_shifted)
+    assert cache.stats["hits"] == 3 * 3 and cache.stats["misses"] == 15
+
+    # a memory budget of one tile evicts, the disk store still serves them
+    small = TileCache(max_bytes=1, directory=tmp_path)
+    calc = MandelbrotCalculator(tile_size=16, tile_cache=small)
+    assert np.array_equal(calc.compute(view_shape, view, maxiter), expected)
+    assert small.stats["disk_hits"] == 12 and small.stats["evictions"] == 11
+
+
+def test_compute_app_reuses_panned_pixels():
+    app = ComputeApp({"resolution": 81, "iterations": maxiter})
+    app.set_boundaries([-2.0, 0.5, -1.25, 1.25])
+    app.recompute()
+    assert app.get_reused_pixels() == 0
+
+    # pan by 5 columns and 3 rows of the 1/32 pixel pitch, exact in binary
+    pitch = 1 / 32
+    panned = [-2.0 + 5 * pitch, 0.5 + 5 * pitch, -1.25 - 3 * pitch, 1.25 - 3 * pitch]
+    app.set_boundaries(panned)
+    result = app.recompute()
+    assert app.get_reused_pixels() == 76 * 78
+    expected = MandelbrotCalculator().compute((81, 81), panned, maxiter)
+    assert np.array_equal(result, expected)
+
+    # going back to the first view is a full copy
+    app.set_boundaries([-2.0, 0.5, -1.25, 1.25])
+    app.recompute()
+    assert app.get_reused_pixels() == 81 * 81
+
+    # a 3/80 pitch pans onto coordinates that differ in the last bit
+    app.set_boundaries([-2.0, 1.0, -1.5, 1.5])
+    app.recompute()
+    app.set_boundaries([-2.0 + 5 * 3 / 80, 1.0 + 5 * 3 / 80, -1.5, 1.5])
+    app.recompute()
+    assert app.get_reused_pixels() == 0
+
+    # symmetric views are nudged as a whole, strips would miss that
+    app = ComputeApp({"resolution": 401, "iterations": maxiter, "symmetry": True})
+    app.set_boundaries([-2.0, 0.5, -1.25, 1.25])
+    app.recompute()
+    app.recompute()
+    assert app.get_reused_pixels() == 0
+
+
+def test_symmetry_matches_full_view():
+    # both views have rows that pair up exactly across the real axis
+    views = [((60, 83), (-2.0, 1.0, -1.5, 1.5)), ((61, 83), (-2.0, 1.0, -0.3, 1.5))]
+    for view_shape, view in views:
+        for config in configs:
+            expected = MandelbrotCalculator(**config).compute(view_shape, view, maxiter)
+            result = MandelbrotCalculator(**config, symmetry=True).compute(
+                view_shape, view, maxiter
+            )
+            assert np.array_equal(result, expected), f"mismatch: {config} {view}"
+
+    # otherwise the grid is nudged, here rows k and 58 - k become mirror images
+    result = MandelbrotCalculator(symmetry=True).compute(shape, bounds, maxiter)
+    assert np.array_equal(result[:59], result[58::-1])
+
+
+def test_tensorflow_symmetry_matches_full_view():
+    pytest.importorskip("tensorflow")
+    from mandelcomplex import MandelComplex
+    from mandelnocomplex import MandelNoComplex
+
+    for mandel in (MandelComplex(), MandelNoComplex()):
+        mandel.set_resolution(64, 64)
+        mandel.set_iterations(30)
+        mandel.set_functionality(True, True)
+        expected = mandel.calculate_mandelbrot()
+        mandel.set_symmetry(True)
+        result = mandel.calculate_mandelbrot()
+        if isinstance(expected, tuple):
+            expected, result = expected[0], result[0]  # N of (N, Z, mask)
+        assert np.array_equal(result, expected), type(mandel).__name__
+
+
+def test_tensorflow_fused_loop_matches_steps():
+    pytest.importorskip("tensorflow")
+    from mandelcomplex import MandelComplex
+    from mandelnocomplex import MandelNoComplex
+
+    for mandel in (MandelComplex(), MandelNoComplex()):
+        mandel.set_resolution(64, 48)
+        mandel.set_iterations(40)
+        for degree in (2, 3, 2.5):
+            mandel.set_degree(degree)
+            mandel.set_fused_loop(False)
+            expected = mandel.calculate_mandelbrot()
+            mandel.set_fused_loop(True)
+            result = mandel.calculate_mandelbrot()
+            if isinstance(expected, tuple):
+                expected, result = expected[0], result[0]
+            assert np.array_equal(result, expected), (type(mandel).__name__, degree)
+
+
+def test_tensorflow_setters_defer_the_coordinates():
+    pytest.importorskip("tensorflow")
+    from mandelcomplex import MandelComplex
+    from mandelnocomplex import MandelNoComplex
+
+    for mandel in (MandelComplex(), MandelNoComplex()):
+        for width in range(10, 50, 10):
+            mandel.set_resolution(width, 30)
+            mandel.set_coordinates(-2.0, 1.0, -1.0, width / 40)
+            mandel.set_symmetry(width % 20 == 0)
+        assert mandel._x is None  # nothing computed so far
+        mandel.set_iterations(10)
+        mandel.calculate_mandelbrot()
+        # only the axes are kept, C is broadcast from them
+        assert mandel._x.ndim == mandel._y.ndim == 1
+        assert mandel._x.size + mandel._y.size == 70
+
+
+def test_tensorflow_compacted_masking_matches_steps():
+    pytest.importorskip("tensorflow")
+    from mandelcomplex import MandelComplex
+    from mandelnocomplex import MandelNoComplex
+
+    for mandel in (MandelComplex(), MandelNoComplex()):
+        mandel.set_resolution(64, 48)
+        mandel.set_iterations(40)
+        for degree, threshold in ((2, 2.0), (3, 4.0), (2.5, 2.0)):
+            mandel.set_degree(degree)
+            mandel.set_threshold(threshold)
+            mandel.set_functionality(True, False)
+            expected = mandel.calculate_mandelbrot()
+            for inplace in (False, True):
+                mandel.set_functionality(inplace, True)
+                result = mandel.calculate_mandelbrot()
+                if isinstance(result, tuple):
+                    # escaped pixels keep the Z they escaped with
+                    assert np.array_equal(result[1], expected[1])
+                    assert np.array_equal(result[0], expected[0]), degree
+                else:
+                    assert np.array_equal(result, expected), degree
+
+
+def test_progress_events_are_rate_limited():
+    from mandel_progress import ProgressReporter
+
+    events = []
+    progress = ProgressReporter(lambda *event: events.append(event), 1000)
+    progress.update(0, 500)  # the first update always gets through
+    for iteration in range(1, 1000):
+        progress.update(iteration, lambda: 1 / 0)  # only evaluated when sent
+    progress.finish(7)
+    assert [event[:3] for event in events] == [(0, 1000, 500), (1000, 1000, 7)]
+
+
+def test_tensorflow_progress_reports_live_pixels():
+    pytest.importorskip("tensorflow")
+    from mandelcomplex import MandelComplex
+    from mandelnocomplex import MandelNoComplex
+
+    modes = [(False, False), (True, False), (False, True), "fused"]
+    for engine in (MandelComplex, MandelNoComplex):
+        for mode in modes:
+            events = []
+            mandel = engine()
+            mandel.set_progress_callback(lambda *event: events.append(event))
+            if mode == "fused":
+                mandel.set_fused_loop(True)
+            else:
+                mandel.set_functionality(*mode)
+            mandel.set_resolution(40, 30)
+            mandel.set_iterations(25)
+            counts = mandel.calculate_mandelbrot()
+            if isinstance(counts, tuple):
+                counts = counts[0]
+            assert events[0][:3] == (0, 25, 40 * 30), (engine.__name__, mode)
+            assert events[-1][:3] == (25, 25, np.sum(counts == 26)), mode
+            assert all(0 <= live <= 40 * 30 for _, _, live, _ in events)
+
+
+def test_numpy_progress_reports_live_pixels():
+    shape, bounds, maxiter = (30, 40), (-2.0, 0.5, -1.25, 1.25), 25
+    engines = [
+        {},
+        {"in_place": True, "use_mask": True},
+        {"use_complex": False},
+        {"compact": True},
+        {"block_size": 4},
+    ]
+    for options in engines:
+        events = []
+        calc = MandelbrotCalculator(
+            progress_callback=lambda *event: events.append(event), **options
+        )
+        div_time = calc.compute(shape, bounds, maxiter)
+        assert events[0][:3] == (0, maxiter, 30 * 40), options
+        assert events[-1][:3] == (maxiter, maxiter, np.sum(div_time == maxiter))
+        iterations = [iteration for iteration, _, _, _ in events]
+        assert iterations == sorted(iterations), options
+        assert all(0 <= live <= 30 * 40 for _, _, live, _ in events)
+
+
+def test_tensorflow_kernels_do_not_retrace():
+    pytest.importorskip("tensorflow")
+    from mandelbase import trace_count
+    from mandelcomplex import MandelComplex
+    from mandelnocomplex import MandelNoComplex
+
+    modes = [(False, False), (True, False), (False, True), (True, True), "fused"]
+    views = [((40, 30), 2.0), ((64, 48), 3.5), ((17, 90), 2.5)]
+    for engine in (MandelComplex, MandelNoComplex):
+        for mode in modes:
+            mandel = engine()
+            if mode == "fused":
+                mandel.set_fused_loop(True)
+            else:
+                mandel.set_functionality(*mode)
+            mandel.set_iterations(10)
+            mandel.warm_up()
+            traces = trace_count()
+            for resolution, threshold in views:
+                mandel.set_resolution(*resolution)
+                mandel.set_threshold(threshold)
+                mandel.calculate_mandelbrot()
+            assert trace_count() == traces, (engine.__name__, mode)
+
+
+def test_fused_engines_are_identical():
+    # the pre-fused complex engine, kept as the reference for degree 2
+    x, y = grid_axes(shape, bounds)
+    c = x[np.newaxis, :] + 1j * y[:, np.newaxis]
+    z = np.zeros_like(c)
+    reference = np.full(shape, maxiter)
+    for i in range(maxiter):
+        z = z**2 + c
+        escaped = np.abs(z) > 2
+        reference[escaped & (reference == maxiter)] = i
+        z[escaped] = 2
+
+    for degree in (2, 3, 4, 5):
+        results = [
+            MandelbrotCalculator(**config).compute(shape, bounds, maxiter, degree)
+            for config in configs
+        ]
+        complex_results, split_results = results[:3], results[3:]
+        for result in complex_results[1:]:
+            assert np.array_equal(result, complex_results[0]), f"degree {degree}"
+        for result in split_results[1:]:
+            assert np.array_equal(result, split_results[0]), f"degree {degree}"
+        if degree == 2:
+            for result in results:
+                assert np.array_equal(result, reference)
+
+
+def test_compact_engine_matches_complex_engine():
+    for degree in (2, 3, 5):
+        expected = MandelbrotCalculator().compute(shape, bounds, maxiter, degree)
+        result = MandelbrotCalculator(compact=True).compute(
+            shape, bounds, maxiter, degree
+        )
+        assert np.array_equal(result, expected), f"degree {degree}"
+
+    expected = MandelbrotCalculator(periodicity=True, return_period=True).compute(
+        shape, bounds, maxiter
+    )
+    result = MandelbrotCalculator(
+        compact=True, periodicity=True, return_period=True
+    ).compute(shape, bounds, maxiter)
+    assert np.array_equal(result[0], expected[0])
+    assert np.array_equal(result[1], expected[1])
+
+
+def test_blocked_iteration_keeps_exact_counts():
+    for use_complex in (True, False):
+        for degree in (2, 3):
+            expected = MandelbrotCalculator(use_complex=use_complex).compute(
+                shape, bounds, maxiter, degree
+            )
+            for block_size in (1, 7, 64, "auto"):
+                result = MandelbrotCalculator(
+                    use_complex=use_complex, block_size=block_size
+                ).compute(shape, bounds, maxiter, degree)
+                assert np.array_equal(result, expected), (use_complex, block_size)
+
+
+def test_every_engine_honours_degree():
+    x, y = grid_axes(shape, bounds)
+    c = x[np.newaxis, :] + 1j * y[:, np.newaxis]
+    extra = [{"compact": True}, {"block_size": 8, "use_complex": False}]
+    for degree in (6, 11, 2.5, 3.7):
+        z = np.zeros_like(c)
+        reference = np.full(shape, maxiter)
+        for i in range(maxiter):
+            z = z**degree + c
+            escaped = np.abs(z) > 2
+            reference[escaped & (reference == maxiter)] = i
+            z[escaped] = 2
+
+        for config in configs + extra:
+            result = MandelbrotCalculator(**config).compute(
+                shape, bounds, maxiter, degree
+            )
+            # chains/polar form round differently from numpy's complex power
+            assert np.mean(result != reference) < 1e-3, (degree, config)
+
+    with pytest.raises(ValueError):
+        MandelbrotCalculator().compute(shape, bounds, maxiter, 0.5)
+
+
+def test_threshold_reaches_every_engine():
+    x, y = grid_axes(shape, bounds)
+    c = x[np.newaxis, :] + 1j * y[:, np.newaxis]
+    z = np.zeros_like(c)
+    reference = np.full(shape, maxiter)
+    for i in range(maxiter):
+        z = np.where(reference == maxiter, z * z + c, z)
+        reference[(np.abs(z) > 5.0) & (reference == maxiter)] = i
+
+    extra = [{"compact": True}, {"block_size": 8}, {"deep_zoom": True}]
+    for config in configs + extra:
+        result = MandelbrotCalculator(threshold=5.0, **config).compute(
+            shape, bounds, maxiter
+        )
+        assert np.array_equal(result, reference), config
+
+
+def test_smooth_counts_are_continuous():
+    counts = MandelbrotCalculator().compute(shape, bounds, maxiter)
+    smooth = MandelbrotCalculator(smooth=True).compute(shape, bounds, maxiter)
+    assert smooth.dtype == np.float32
+    assert np.array_equal(smooth == maxiter, counts == maxiter)
+
+    # a line crossing many escape bands: integer counts jump, smooth ones don't
+    cx = np.linspace(-2.0, -1.8, 500)
+    line = MandelbrotCalculator(smooth=True).compute_points(cx, 0.05, 200)
+    assert np.abs(np.diff(line)).max() < 0.05
+
+    with pytest.raises(ValueError):
+        MandelbrotCalculator(smooth=True, threshold=1.5).compute(shape, bounds, maxiter)
+
+
+def test_output_channels_match_direct_iteration():
+    x, y = grid_axes(shape, bounds)
+    c = x[np.newaxis, :] + 1j * y[:, np.newaxis]
+    z, dz = np.zeros_like(c), np.zeros_like(c)
+    trap = np.full(shape, np.inf)
+    active = np.ones(shape, dtype=bool)
+    final_z, final_dz, final_trap = z.copy(), dz.copy(), trap.copy()
+    for _ in range(maxiter):
+        dz[active] = 2 * z[active] * dz[active] + 1
+        z[active] = z[active] ** 2 + c[active]
+        trap[active] = np.minimum(trap[active], np.abs(z[active]))
+        escaped = active & (np.abs(z) > 2)
+        final_z[escaped], final_dz[escaped] = z[escaped], dz[escaped]
+        final_trap[escaped] = trap[escaped]
+        active &= ~escaped
+    final_z[active], final_dz[active] = z[active], dz[active]
+    final_trap[active] = trap[active]
+
+    renderer = MandelbrotCalculator(channels=("abs2", "z", "dzdc", "trap"))
+    div_time, channels = renderer.compute(shape, bounds, maxiter)
+    plain = MandelbrotCalculator().compute(shape, bounds, maxiter)
+    assert np.array_equal(div_time, plain)
+    assert np.allclose(channels["z"], final_z)
+    assert np.allclose(channels["abs2"], np.abs(final_z) ** 2)
+    assert np.allclose(channels["dzdc"], final_dz)
+    assert np.allclose(channels["trap"], final_trap)
+
+    # cycle detection retires interior pixels early, escaping ones keep theirs
+    periodic = MandelbrotCalculator(
+        channels=("z", "dzdc"), periodicity=True, return_period=True
+    )
+    div_time, period, periodic_channels = periodic.compute(shape, bounds, maxiter)
+    escaped = div_time < maxiter
+    assert escaped.any() and (period > 0).any()
+    for name in ("z", "dzdc"):
+        assert np.allclose(periodic_channels[name][escaped], channels[name][escaped])
+
+    app = ComputeApp({"resolution": 64, "channels": ("z",)})
+    fractal = app.recompute()
+    assert fractal.shape == app.get_last_channels()["z"].shape == (64, 64)
+    # deep zooms (perturbation) have no channels instead of failing
+    app.set_boundaries(["-0.75", "-0.7499999999999999", "0.1", "0.1000000000000001"])
+    app.set_iterations(30)
+    assert app.recompute().shape == (64, 64)
+    assert app.get_last_channels() == {}
+    with pytest.raises(ValueError):
+        MandelbrotCalculator(channels=("phase",)).compute(shape, bounds, maxiter)
+
+
+def test_counts_use_compact_dtypes():
+    assert count_dtype(255) == np.uint8
+    assert count_dtype(256) == np.uint16
+    assert count_dtype(70000) == np.uint32
+    assert count_dtype(100, smooth=True) == np.float32
+
+    for kwargs in ({}, {"use_numba": True}, {"compact": True}, {"subdivide": True}):
+        calculator = MandelbrotCalculator(
+            periodicity=True, return_period=True, **kwargs
+        )
+        assert calculator.compute(shape, bounds, 300)[1].dtype == np.uint16
+
+    reference = MandelbrotCalculator().compute(shape, bounds, maxiter).astype(int)
+    for kwargs in ({"use_numba": True}, {"compact": True}, {"subdivide": True}):
+        div_time = MandelbrotCalculator(**kwargs).compute(shape, bounds, 300)
+        assert div_time.dtype == np.uint16
+        # the counts themselves do not change, only their storage
+        assert np.array_equal(np.minimum(div_time, maxiter), reference)
+
+
+def test_log_coloring_keeps_the_top_count():
+    from coloring.log_coloring import LogColoring
+
+    # maxiter=255 fits uint8, the interior count 255 must not wrap to 0
+    data = np.array([[7, 255]], dtype=count_dtype(255))
+    Z = np.array([[3.0 + 0j, 0.1 + 0j]], dtype=np.complex64)
+    mask = np.array([[True, False]])
+    result = LogColoring().apply(data, Z, mask, 255, 1)
+    expected = LogColoring().apply(data.astype(np.int64), Z, mask, 255, 1)
+    assert np.allclose(result, expected)
+    assert result[0, 1] == 256 % 255
+
+
+def test_banded_streaming_matches_single_pass(tmp_path):
+    # a budget of 5 rows per band, the last band is partial
+    budget = 5 * shape[1] * STREAM_BYTES_PER_PIXEL
+    for kwargs in ({}, {"compact": True}, {"periodicity": True}):
+        expected = MandelbrotCalculator(return_period=True, **kwargs)
+        banded = MandelbrotCalculator(return_period=True, max_memory=budget, **kwargs)
+        div_time, period = banded.compute(shape, bounds, maxiter)
+        assert banded.last_stats == {"bands": 13, "band_rows": 5}
+        expected_div_time, expected_period = expected.compute(shape, bounds, maxiter)
+        assert np.array_equal(div_time, expected_div_time)
+        if kwargs.get("periodicity"):
+            assert np.array_equal(period, expected_period)
+
+    # the budget is shared by the workers: bands of 2 rows each
+    pooled = MandelbrotCalculator(max_memory=budget, workers=2)
+    assert np.array_equal(pooled.compute(shape, bounds, maxiter), expected_div_time)
+    assert pooled.last_stats == {"bands": 31, "band_rows": 2}
+
+    path = tmp_path / "view.npy"
+    streamed = MandelbrotCalculator(
+        max_memory=budget, periodicity=True
+    ).compute_to_file(path, shape, bounds, maxiter)
+    assert np.array_equal(np.load(path), expected_div_time)
+    assert streamed.dtype == np.load(path).dtype == np.uint8
+
+    # options the bands would ignore are rejected instead
+    for option in ({"subdivide": True}, {"tile_size": 16}, {"channels": ("z",)}):
+        banded = MandelbrotCalculator(max_memory=budget, **option)
+        with pytest.raises(ValueError, match="max_memory"):
+            banded.compute(shape, bounds, maxiter)
+        with pytest.raises(ValueError, match="max_memory"):
+            banded.compute_to_file(path, shape, bounds, maxiter)
+    levels = MandelbrotCalculator(max_memory=budget).compute_progressive(
+        shape, bounds, maxiter
+    )
+    with pytest.raises(ValueError, match="max_memory"):
+        next(levels)
+
+
+def test_render_job_resumes_unfinished_tiles(tmp_path):
+    import json
+
+    path = tmp_path / "poster.npy"
+    expected = MandelbrotCalculator().compute(shape, bounds, maxiter)
+    job = RenderJob(path, shape, bounds, maxiter, tile_size=32)
+    job.run(MandelbrotCalculator(), verbose=False)
+    assert job.stats["computed"] == len(job.tiles()) == 6
+
+    # a crash after two tiles: the others are neither listed nor written
+    manifest = json.loads((tmp_path / "poster.json").read_text())
+    manifest["done"] = manifest["done"][:2]
+    (tmp_path / "poster.json").write_text(json.dumps(manifest))
+    partial = np.load(path, mmap_mode="r+")
+    partial[32:] = 0
+    partial.flush()
+    del partial
+
+    result = job.run(MandelbrotCalculator(), verbose=False)
+    assert job.stats["skipped"] == 2 and job.stats["computed"] == 4
+    assert np.array_equal(result, expected)
+
+    # other parameters start over
+    RenderJob(path, shape, bounds, maxiter + 1, tile_size=32).run(
+        MandelbrotCalculator(), verbose=False
+    )
+    assert np.load(path).max() == maxiter + 1
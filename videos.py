@@ -1,7 +1,9 @@
 import numpy as np
 import cv2
 import os
+from decimal import Decimal
 from compute import ComputeApp
+from mandel_perturbation import decimal_precision, to_decimal
 from colorize import ColorizeApp
 from natsort import natsorted
 
@@ -11,6 +13,8 @@ class VideoApp():
         self.node_colorize = node_colorize
 
     #the render methods assume that the inputs for the initial frame are already applied
+    #view arithmetic runs on Decimal so deep zoom centres keep all their digits
+    @decimal_precision
     def render_steps(self, output_dir: str, frame_count: int, deltas, degree=2) -> None:
         #Init unchanging variables
 
@@ -24,7 +28,7 @@ class VideoApp():
         r_threshold = self.node_compute.get_threshold()
         r_iterations = self.node_compute.get_iterations()
 
-        init_bounds = self.node_compute.get_boundaries()
+        init_bounds = self.node_compute.get_exact_boundaries()
         r_offset = [
             (init_bounds[1] - init_bounds[0]) /2,
             (init_bounds[3] - init_bounds[2]) /2,
@@ -37,9 +41,9 @@ class VideoApp():
         #Get deltas
         delta_iterations = deltas.get('iterations', 0)
         delta_threshold = deltas.get('threshold', 0)
-        delta_x = deltas.get('x', 0)
-        delta_y = deltas.get('y', 0)
-        delta_scale = deltas.get('scale', 1)
+        delta_x = to_decimal(deltas.get('x', 0))
+        delta_y = to_decimal(deltas.get('y', 0))
+        delta_scale = to_decimal(deltas.get('scale', 1))
 
         #RENDER
         for i in range(0, r_frame_count):
@@ -71,6 +75,7 @@ class VideoApp():
             #render current frame
             self.render_frame(i, r_iterations, r_output_dir, degree)
 
+    @decimal_precision
     def render_steps_preview(self, frame_count: int, deltas) -> None: #get state of last frame and render that
         r_frame_count = frame_count
 
@@ -80,7 +85,7 @@ class VideoApp():
         r_threshold = self.node_compute.get_threshold()
         r_iterations = self.node_compute.get_iterations()
 
-        init_bounds = self.node_compute.get_boundaries()
+        init_bounds = self.node_compute.get_exact_boundaries()
         r_offset = [
             (init_bounds[1] - init_bounds[0]) /2,
             (init_bounds[3] - init_bounds[2]) /2,
@@ -93,9 +98,9 @@ class VideoApp():
         #Get deltas
         delta_iterations = deltas.get('iterations', 0)
         delta_threshold = deltas.get('threshold', 0)
-        delta_x = deltas.get('x', 0)
-        delta_y = deltas.get('y', 0)
-        delta_scale = deltas.get('scale', 1)
+        delta_x = to_decimal(deltas.get('x', 0))
+        delta_y = to_decimal(deltas.get('y', 0))
+        delta_scale = to_decimal(deltas.get('scale', 1))
 
         #step-by-step
         for i in range(0, r_frame_count):
@@ -126,6 +131,7 @@ class VideoApp():
         ])
 
 
+    @decimal_precision
     def render_interpolated(self, output_dir: str, frame_count: int, params, degree=2) -> None:
         #unchanging variables
         #self.active_renderer.set_resolution(self.get_current_height(), self.get_current_width())
@@ -142,7 +148,7 @@ class VideoApp():
         mode_trans = params.get('mode_trans', 1) # -1: not applied, 0: linear, 1: scaleDependant
 
         #start frame (0)
-        init_bounds = self.node_compute.get_boundaries()
+        init_bounds = self.node_compute.get_exact_boundaries()
         start_offset = [
             (init_bounds[1] - init_bounds[0]) /2,
             (init_bounds[3] - init_bounds[2]) /2,
@@ -153,7 +159,7 @@ class VideoApp():
         ]
 
         #end frame (n-1)
-        final_bounds = params.get('final_bounds', [-2, 2, -2, 2])
+        final_bounds = [to_decimal(b) for b in params.get('final_bounds', [-2, 2, -2, 2])]
         end_offset = [
             (final_bounds[1] - final_bounds[0]) /2,
             (final_bounds[3] - final_bounds[2]) /2,
@@ -173,7 +179,7 @@ class VideoApp():
                 scale_delta_step = (end_offset[0] - start_offset[0])/(r_frame_count-1) #change to be applied additively
             case 1: #exponential
                 scale_delta_full = end_offset[0] / start_offset[0]
-                scale_delta_step = pow(scale_delta_full, 1/(r_frame_count-1)) #frame = base * (delta^i)
+                scale_delta_step = pow(scale_delta_full, Decimal(1)/(r_frame_count-1)) #frame = base * (delta^i)
             case _: #not applied
                 #set translation mode from scaleDependant to linear
                 if mode_trans == 1:
@@ -248,7 +254,7 @@ class VideoApp():
 
     def render_frame(self, i: int, iterations: float, output_dir: str, degree=2) -> None:
         fractal = self.node_compute.recompute(degree)
-        fractal = self.node_colorize.modify_fractal(fractal, self.node_compute.get_iterations()) #compute and colorize no longer support self.node_compute.get_cycles()
+        fractal = self.node_colorize.modify_fractal(fractal, self.node_compute.get_iterations(), self.node_compute.get_last_channels()) #compute and colorize no longer support self.node_compute.get_cycles()
 
         self.node_colorize.save_image(
             f"{output_dir}/{i}.png",